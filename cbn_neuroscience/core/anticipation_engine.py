@@ -1,43 +1,236 @@
 # cbn_neuroscience/core/anticipation_engine.py
 
+from collections import OrderedDict
+
+import numpy as np
+from cbn_neuroscience.core.simulation import load_kernels
+
+def _state_key(state) -> bytes:
+    """Clave compacta de un estado: sus bits empaquetados."""
+    return np.packbits(np.asarray(state) != 0).tobytes()
+
+class StabilityResult:
+    """
+    Resultado de observar un estado en AnticipationMonitor.
+
+    Attributes:
+        is_stable (bool): Si el concepto se ha reconocido: el estado ya se había observado
+                          o pertenece a un atractor (o cuenca) conocido.
+        cycle_length (int): Longitud del ciclo detectado (1 para un punto fijo, 0 si no es estable).
+        cycle_start (int): Paso en que se vio el estado por última vez (-1 si no es estable
+                           o si se reconoció un atractor conocido).
+        step (int): Paso de esta observación.
+        attractor (int): Identificador del atractor conocido reconocido o predicho (-1 si ninguno).
+    """
+    __slots__ = ('is_stable', 'cycle_length', 'cycle_start', 'step', 'attractor')
+
+    def __init__(self, is_stable: bool, cycle_length: int, cycle_start: int, step: int, attractor: int = -1):
+        self.is_stable = is_stable
+        self.cycle_length = cycle_length
+        self.cycle_start = cycle_start
+        self.step = step
+        self.attractor = attractor
+
+    @property
+    def is_fixed_point(self) -> bool:
+        return self.cycle_length == 1
+
+
 class AnticipationMonitor:
     """
     Un observador que monitorea el estado de una columna (o red) para
     detectar si ha caído en un estado estable (atractor).
+
+    Estrategias de detección:
+        'registry': cada estado se guarda como una clave de bytes empaquetados junto
+                    con el paso en que se observó; un ciclo se detecta en cuanto un
+                    estado se repite y su longitud se obtiene en O(1).
+        'brent': algoritmo de Brent en modo streaming. Solo guarda un estado de
+                 referencia, a costa de detectar el ciclo algunos pasos después
+                 (como mucho del orden de 2 * (transitorio + ciclo) pasos).
+                 Supone una dinámica determinista: con ruido puede no detectar
+                 ciclos o tardar más en hacerlo.
     """
-    def __init__(self):
-        self.attractor_registry = set()
-        self.history = []
+    STRATEGIES = ('registry', 'brent')
+
+    def __init__(self, max_history: int = None, strategy: str = 'registry', known_attractors=None):
+        """
+        Args:
+            max_history (int, optional): Número máximo de estados recordados por la estrategia
+                                         'registry'. Al superarlo se olvida el más antiguo, por lo
+                                         que solo se detectan ciclos de longitud <= max_history.
+                                         Por defecto, sin límite.
+            strategy (str): 'registry' o 'brent'.
+            known_attractors (AttractorSet | BasinIndex, optional): Atractores (o cuencas) de
+                                                       ejecuciones anteriores (véase attractor_store).
+                                                       Un estado que pertenece a uno de ellos se
+                                                       reconoce de inmediato, sin esperar a que se
+                                                       repita; con un BasinIndex basta con tocar un
+                                                       estado transitorio conocido de su cuenca.
+        """
+        if max_history is not None and max_history < 1:
+            raise ValueError("max_history debe ser >= 1.")
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Estrategia desconocida: '{strategy}'. Opciones: {self.STRATEGIES}.")
+        self.max_history = max_history
+        self.strategy = strategy
+        self.known_attractors = known_attractors
+        self.reset()
+
+    def observe(self, state) -> StabilityResult:
+        """
+        Registra un estado y comprueba si cierra un ciclo.
+
+        Args:
+            state: El estado actual de la red (np.ndarray, tupla o lista de 0/1).
+
+        Returns:
+            StabilityResult: Si el estado es estable y la longitud del ciclo.
+        """
+        key = _state_key(state)
+        step = self.step
+        self.step += 1
+        if self.known_attractors is not None:
+            attractor = self.known_attractors.lookup_key(key)
+            if attractor >= 0:
+                return StabilityResult(True, self.known_attractors.cycle_length(attractor), -1, step, attractor)
+        if self.strategy == 'brent':
+            return self._observe_brent(key, step)
+
+        last_seen = self._last_seen.pop(key, None)
+        self._last_seen[key] = step
+        if last_seen is None and self.max_history is not None and len(self._last_seen) > self.max_history:
+            self._last_seen.popitem(last=False)
+
+        if last_seen is None:
+            return StabilityResult(False, 0, -1, step)
+        return StabilityResult(True, step - last_seen, last_seen, step)
+
+    def _observe_brent(self, key: bytes, step: int) -> StabilityResult:
+        if self._tortoise is not None and key == self._tortoise:
+            cycle_start = self._tortoise_step
+            self._tortoise_step = step
+            return StabilityResult(True, step - cycle_start, cycle_start, step)
+
+        # La referencia avanza al estado actual cada vez que la distancia alcanza una potencia de 2
+        if self._tortoise is None or step - self._tortoise_step == self._power:
+            if self._tortoise is not None:
+                self._power *= 2
+            self._tortoise = key
+            self._tortoise_step = step
+        return StabilityResult(False, 0, -1, step)
 
     def check_stability(self, state: tuple) -> tuple[bool, str]:
         """
         Detecta si el sistema ha 'reconocido' el estímulo al caer en un atractor.
 
         Args:
-            state (tuple): El estado actual de la red, convertido a una tupla para ser hashable.
+            state (tuple): El estado actual de la red.
 
         Returns:
             tuple[bool, str]: Una tupla con un booleano que indica si se ha alcanzado la estabilidad
                               y un mensaje descriptivo.
         """
-        if state in self.attractor_registry:
+        result = self.observe(state)
+        if not result.is_stable:
+            return False, "Procesando..."
+        if result.is_fixed_point:
+            return True, f"Concepto Reconocido (Punto Fijo: {state})"
+        return True, f"Concepto Reconocido (Ciclo Límite de longitud {result.cycle_length})"
+
+    def reset(self):
+        """Reinicia el monitor para una nueva simulación."""
+        # Clave del estado -> último paso en que se observó, en orden de observación
+        self._last_seen = OrderedDict()
+        # Estado de referencia del algoritmo de Brent
+        self._tortoise = None
+        self._tortoise_step = -1
+        self._power = 1
+        self.step = 0
+
+
+class BatchAnticipationMonitor:
+    """
+    Monitor de anticipación para un lote de trayectorias simuladas en paralelo.
+
+    Cada paso recibe una matriz de estados (batch, n_vars). Los estados de todas las
+    trayectorias se guardan en una única tabla hash compilada con clave
+    (trayectoria, hash FNV-1a de 64 bits del estado), junto con el estado
+    empaquetado por bits para descartar colisiones de hash, y las trayectorias ya
+    reconocidas dejan de registrarse. Como en la estrategia 'registry', una
+    trayectoria se reconoce cuando repite un estado.
+    """
+    def __init__(self, batch_size: int, initial_capacity: int = 1024):
+        self.batch_size = batch_size
+        self.initial_capacity = initial_capacity
+        self.reset()
+
+    @property
+    def n_active(self) -> int:
+        """Número de trayectorias que aún no han sido reconocidas."""
+        return int(self.batch_size - np.count_nonzero(self.recognized))
+
+    def observe(self, states: np.ndarray) -> np.ndarray:
+        """
+        Registra el estado actual de cada trayectoria.
 
-            try:
-                start_index = self.history.index(state)
-                cycle_len = len(self.history) - start_index
-                if cycle_len == 1:
-                    return True, f"Concepto Reconocido (Punto Fijo: {state})"
-                else:
-                    return True, f"Concepto Reconocido (Ciclo Límite de longitud {cycle_len})"
-            except ValueError:
-                # Esto no debería ocurrir si el estado está en el registro.
-                return True, "Concepto Reconocido (Atractor)"
+        Args:
+            states (np.ndarray): Estados de forma (batch_size, n_vars).
 
-        self.attractor_registry.add(state)
-        self.history.append(state)
-        return False, "Procesando..."
+        Returns:
+            np.ndarray: Máscara booleana de las trayectorias reconocidas en este paso.
+                        Los atributos recognized, recognition_step (paso de reconocimiento,
+                        -1 si aún no) y cycle_length acumulan el resultado por trayectoria.
+        """
+        states = np.asarray(states)
+        if states.ndim != 2 or states.shape[0] != self.batch_size:
+            raise ValueError("states debe tener forma (batch_size, n_vars).")
+        packed = np.packbits(states != 0, axis=1)
+
+        active = ~self.recognized
+        n_active = self.batch_size - np.count_nonzero(self.recognized)
+        capacity = len(self._table_keys)
+        if 2 * (self._count + n_active) > capacity:
+            while 2 * (self._count + n_active) > capacity:
+                capacity *= 2
+            self._table_keys, self._table_traj, self._table_step, self._table_ref = load_kernels()._rehash_table(
+                self._table_keys, self._table_traj, self._table_step, self._table_ref, capacity
+            )
+        # Búfer de estados empaquetados, con sitio para todos los que puedan insertarse en este paso
+        if self._state_buffer.shape[1] != packed.shape[1]:
+            if self._count:
+                raise ValueError("El número de variables no puede cambiar entre pasos.")
+            self._state_buffer = np.zeros((len(self._table_keys) // 2, packed.shape[1]), dtype=np.uint8)
+        if len(self._state_buffer) < self._count + n_active:
+            grown = np.zeros((len(self._table_keys) // 2, packed.shape[1]), dtype=np.uint8)
+            grown[:self._count] = self._state_buffer[:self._count]
+            self._state_buffer = grown
+
+        last_seen = np.empty(self.batch_size, dtype=np.int64)
+        self._count += load_kernels()._batch_observe(
+            packed, active, self.step, self._table_keys, self._table_traj, self._table_step, self._table_ref,
+            self._state_buffer, self._count, last_seen
+        )
+
+        hits = last_seen >= 0
+        self.recognized |= hits
+        self.recognition_step[hits] = self.step
+        self.cycle_length[hits] = self.step - last_seen[hits]
+        self.step += 1
+        return hits
 
     def reset(self):
         """Reinicia el monitor para una nueva simulación."""
-        self.attractor_registry.clear()
-        self.history = []
+        self.step = 0
+        self.recognized = np.zeros(self.batch_size, dtype=bool)
+        self.recognition_step = np.full(self.batch_size, -1, dtype=np.int64)
+        self.cycle_length = np.zeros(self.batch_size, dtype=np.int64)
+
+        capacity = 1 << max(1, int(self.initial_capacity - 1).bit_length())
+        self._table_keys = np.zeros(capacity, dtype=np.uint64)
+        self._table_traj = np.full(capacity, -1, dtype=np.int64)
+        self._table_step = np.zeros(capacity, dtype=np.int64)
+        self._table_ref = np.zeros(capacity, dtype=np.int64)
+        # Estados empaquetados de las entradas de la tabla (se dimensiona en el primer paso)
+        self._state_buffer = np.zeros((0, 0), dtype=np.uint8)
+        self._count = 0
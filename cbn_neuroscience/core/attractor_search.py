@@ -0,0 +1,112 @@
+# cbn_neuroscience/core/attractor_search.py
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+
+import numpy as np
+from cbnetwork.cbnetwork import CBN
+from cbn_neuroscience.core.simulation import Simulator, load_kernels
+from cbn_neuroscience.core.state_space import map_compiled_rules
+
+def _canonical_cycle(cycle_states: np.ndarray) -> np.ndarray:
+    """Rota un ciclo para que empiece en su estado lexicográficamente menor."""
+    rows = [tuple(row) for row in cycle_states]
+    start = rows.index(min(rows))
+    return np.roll(cycle_states, -start, axis=0)
+
+def _local_attractors_task(task: tuple) -> list:
+    """
+    Calcula los atractores de una red local para una combinación fija de señales
+    de entrada. Se ejecuta en los procesos del pool, por lo que solo recibe
+    arreglos y reglas compiladas.
+    """
+    rules, external_arr, max_variables, n_samples, max_steps, seed = task
+    num_vars = rules.n_internal
+
+    if num_vars <= max_variables:
+        state_space = map_compiled_rules(rules, external_arr)
+        cycles = [state_space.attractor_states(a) for a in range(len(state_space.attractors))]
+    else:
+        # Red demasiado grande para enumerarla: muestreo de condiciones iniciales
+        rng = np.random.default_rng(seed)
+        cycles = []
+        for initial_state in rng.integers(0, 2, size=(n_samples, num_vars), dtype=np.uint8):
+            history, cycle_start, cycle_length = load_kernels()._run_until_attractor(
+                initial_state, external_arr, max_steps, *rules.kernel_args()
+            )
+            if cycle_start != -1:
+                cycles.append(history[cycle_start:cycle_start + cycle_length].astype(int))
+
+    unique_cycles = {}
+    for cycle in cycles:
+        cycle = _canonical_cycle(cycle)
+        unique_cycles.setdefault(cycle.tobytes(), cycle)
+    return sorted(unique_cycles.values(), key=lambda c: tuple(c[0]))
+
+
+def find_local_attractors(cbn: CBN, n_workers: int = None, max_variables: int = 25,
+                          n_samples: int = 1000, max_steps: int = 100000, seed: int = 0) -> dict:
+    """
+    Busca los atractores de cada red local de la CBN para cada combinación de
+    valores de sus señales de entrada, repartiendo el trabajo en un pool de procesos.
+
+    Las redes con hasta max_variables variables se resuelven de forma exhaustiva;
+    en las mayores se simulan n_samples condiciones iniciales aleatorias.
+
+    Cada par (red, combinación) se reduce a la huella de sus reglas compiladas con
+    esas entradas (CompiledRules.fingerprint) y los atractores se calculan una sola
+    vez por huella distinta: en una CBN homogénea generada con una plantilla, N
+    búsquedas se convierten en una. Los estados de los ciclos son posicionales, así
+    que el resultado es válido sin cambios para todas las redes que lo comparten.
+
+    Args:
+        cbn (CBN): La red booleana acoplada.
+        n_workers (int, optional): Número de procesos. Por defecto, os.cpu_count();
+                                   con 1 se trabaja en el proceso actual.
+        max_variables (int): Límite para la enumeración exhaustiva.
+        n_samples (int): Condiciones iniciales por combinación en redes grandes.
+        max_steps (int): Pasos máximos por trayectoria muestreada.
+        seed (int): Semilla del muestreo, para resultados reproducibles. Cada búsqueda usa
+                    un flujo derivado de (seed, huella), así que el resultado de una red no
+                    depende de qué otras redes tenga la CBN.
+
+    Returns:
+        dict: {índice de red: {combinación de señales: [ciclos (cycle_length, n_vars)]}},
+              donde la combinación es una tupla de 0/1 en el orden de las variables
+              externas ordenadas. Los ciclos están rotados a su estado menor y ordenados.
+    """
+    keys = []
+    key_tasks = []
+    tasks = []
+    task_of_fingerprint = {}
+    for network in cbn.l_local_networks:
+        simulator = Simulator(network)
+        for combination in product((0, 1), repeat=len(simulator.external_keys)):
+            external_values = dict(zip(simulator.external_keys, combination))
+            rules = simulator.compiled_rules(external_values)
+            external_arr = rules.external_array(external_values)
+            fingerprint = rules.fingerprint(external_arr)
+            if fingerprint not in task_of_fingerprint:
+                # La semilla del muestreo se deriva de la huella: no depende de las redes anteriores
+                task_seed = np.random.SeedSequence([seed, int(fingerprint, 16)]).generate_state(1)[0]
+                task_of_fingerprint[fingerprint] = len(tasks)
+                tasks.append((rules, external_arr, max_variables, n_samples, max_steps, task_seed))
+            keys.append((network.index, combination))
+            key_tasks.append(task_of_fingerprint[fingerprint])
+
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+
+    if n_workers == 1 or len(tasks) <= 1:
+        results = list(map(_local_attractors_task, tasks))
+    else:
+        chunksize = max(1, len(tasks) // (4 * n_workers))
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            # map conserva el orden de las tareas: la fusión es determinista
+            results = list(executor.map(_local_attractors_task, tasks, chunksize=chunksize))
+
+    local_attractors = {}
+    for (network_index, combination), task in zip(keys, key_tasks):
+        local_attractors.setdefault(network_index, {})[combination] = list(results[task])
+    return local_attractors
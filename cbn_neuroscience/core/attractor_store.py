@@ -0,0 +1,156 @@
+# cbn_neuroscience/core/attractor_store.py
+
+import os
+
+import numpy as np
+from cbn_neuroscience.core.anticipation_engine import _state_key
+from cbn_neuroscience.core.simulation import Simulator
+
+class AttractorSet:
+    """
+    Atractores conocidos de una red local con una combinación fija de entradas.
+
+    Cada estado de cada ciclo se indexa por sus bits empaquetados, de modo que
+    comprobar si un estado pertenece a algún atractor cuesta O(1).
+    """
+    def __init__(self, num_vars: int, cycles: list = None):
+        self.num_vars = num_vars
+        self.cycles = []
+        self._index = {}
+        for cycle in cycles or []:
+            self.add(cycle)
+
+    def __len__(self) -> int:
+        return len(self.cycles)
+
+    def add(self, cycle_states: np.ndarray) -> int:
+        """
+        Añade un ciclo (cycle_length, n_vars) si aún no se conoce y devuelve su identificador.
+        """
+        cycle_states = np.asarray(cycle_states, dtype=np.uint8).reshape(-1, self.num_vars)
+        attractor = self.lookup(cycle_states[0])
+        if attractor >= 0:
+            return attractor
+        attractor = len(self.cycles)
+        self.cycles.append(cycle_states)
+        for state in cycle_states:
+            self._index[_state_key(state)] = attractor
+        return attractor
+
+    def lookup(self, state) -> int:
+        """Devuelve el identificador del atractor que contiene el estado, o -1."""
+        return self._index.get(_state_key(state), -1)
+
+    def lookup_key(self, key: bytes) -> int:
+        return self._index.get(key, -1)
+
+    def cycle_length(self, attractor: int) -> int:
+        return len(self.cycles[attractor])
+
+
+class BasinIndex:
+    """
+    Índice de estados transitorios ya observados, cada uno asociado al atractor
+    que su trayectoria acabó alcanzando. Permite reconocer un concepto en cuanto
+    una trayectoria toca un estado conocido de su cuenca, antes de asentarse.
+
+    Expone la misma interfaz de consulta que AttractorSet (lookup, lookup_key,
+    cycle_length), por lo que puede usarse como known_attractors de AnticipationMonitor.
+    """
+    def __init__(self, attractors: AttractorSet):
+        self.attractors = attractors
+        self.num_vars = attractors.num_vars
+        self._basin = {}
+
+    def __len__(self) -> int:
+        """Número de estados transitorios indexados."""
+        return len(self._basin)
+
+    def add_trajectory(self, transient_states: np.ndarray, cycle_states: np.ndarray) -> int:
+        """Asocia los estados de un transitorio al atractor que alcanzó y devuelve su identificador."""
+        attractor = self.attractors.add(cycle_states)
+        for state in np.asarray(transient_states).reshape(-1, self.num_vars):
+            self._basin[_state_key(state)] = attractor
+        return attractor
+
+    def update(self, simulator: Simulator, initial_states: np.ndarray, external_values: dict = None,
+               max_steps: int = 100000) -> 'BasinIndex':
+        """Simula desde cada estado inicial aún no indexado y añade su transitorio y su atractor."""
+        for initial_state in np.atleast_2d(initial_states):
+            if self.lookup(initial_state) >= 0:
+                continue
+            transient, cycle_states, cycle_length, trajectory = simulator.run_until_attractor(
+                initial_state, external_values, max_steps, return_trajectory=True
+            )
+            if cycle_length > 0:
+                self.add_trajectory(trajectory[:transient], cycle_states)
+        return self
+
+    def lookup(self, state) -> int:
+        """Devuelve el atractor al que lleva el estado, o -1 si no se conoce."""
+        return self.lookup_key(_state_key(state))
+
+    def lookup_key(self, key: bytes) -> int:
+        attractor = self._basin.get(key, -1)
+        return attractor if attractor >= 0 else self.attractors.lookup_key(key)
+
+    def cycle_length(self, attractor: int) -> int:
+        return self.attractors.cycle_length(attractor)
+
+
+class AttractorStore:
+    """
+    Registro persistente de atractores en disco: un archivo .npz por huella de red
+    (CompiledRules.fingerprint), con todos los ciclos conocidos concatenados.
+    """
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def fingerprint(simulator: Simulator, external_values: dict = None) -> str:
+        """Huella de las reglas del simulador para unos valores externos constantes."""
+        external_values = external_values or {}
+        rules = simulator.compiled_rules(external_values)
+        return rules.fingerprint(rules.external_array(external_values))
+
+    def path(self, fingerprint: str) -> str:
+        return os.path.join(self.directory, f"{fingerprint}.npz")
+
+    def load(self, fingerprint: str, num_vars: int) -> AttractorSet:
+        """Carga los atractores guardados para una huella (vacío si no hay ninguno)."""
+        path = self.path(fingerprint)
+        if not os.path.exists(path):
+            return AttractorSet(num_vars)
+        with np.load(path) as data:
+            states, cycle_ptr = data['states'], data['cycle_ptr']
+        cycles = [states[cycle_ptr[a]:cycle_ptr[a + 1]] for a in range(len(cycle_ptr) - 1)]
+        return AttractorSet(num_vars, cycles)
+
+    def save(self, fingerprint: str, attractors: AttractorSet):
+        """Guarda los atractores de una huella, reemplazando el archivo de forma atómica."""
+        cycle_ptr = np.zeros(len(attractors) + 1, dtype=np.int64)
+        np.cumsum([len(cycle) for cycle in attractors.cycles], out=cycle_ptr[1:])
+        states = (np.concatenate(attractors.cycles) if attractors.cycles
+                  else np.zeros((0, attractors.num_vars), dtype=np.uint8))
+
+        tmp_path = self.path(fingerprint) + '.tmp.npz'
+        np.savez(tmp_path, states=states, cycle_ptr=cycle_ptr)
+        os.replace(tmp_path, self.path(fingerprint))
+
+    def update(self, simulator: Simulator, initial_states: np.ndarray, external_values: dict = None,
+               max_steps: int = 100000) -> AttractorSet:
+        """
+        Busca los atractores alcanzados desde initial_states, los añade a los ya
+        guardados para esta red y entradas, y devuelve el conjunto actualizado.
+        """
+        fingerprint = self.fingerprint(simulator, external_values)
+        attractors = self.load(fingerprint, len(simulator.network.internal_variables))
+        for initial_state in np.atleast_2d(initial_states):
+            if attractors.lookup(initial_state) >= 0:
+                continue
+            _, cycle_states, cycle_length = simulator.run_until_attractor(initial_state, external_values, max_steps)
+            if cycle_length > 0:
+                attractors.add(cycle_states)
+        self.save(fingerprint, attractors)
+        return attractors
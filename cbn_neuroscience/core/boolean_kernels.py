@@ -0,0 +1,589 @@
+# cbn_neuroscience/core/boolean_kernels.py
+
+# Kernels numba de la simulación booleana. Es el único módulo que importa numba:
+# simulation.load_kernels() lo carga en el primer uso y los kernels se guardan en la
+# caché de disco de numba (cache=True).
+
+import numpy as np
+import numba
+from cbn_neuroscience.core.compiled_rules import compile_cnf_rules
+
+@numba.njit(cache=True)
+def _evaluate_clause(slots: np.ndarray, start: int, end: int, lit_slot: np.ndarray, lit_negated: np.ndarray) -> bool:
+    for k in range(start, end):
+        if slots[lit_slot[k]] != lit_negated[k]:
+            return True
+    return False
+
+@numba.njit(cache=True)
+def _accelerated_next_state(
+    current_state: np.ndarray,
+    external_values_arr: np.ndarray,
+    var_ptr: np.ndarray,
+    clause_ptr: np.ndarray,
+    lit_slot: np.ndarray,
+    lit_negated: np.ndarray,
+    lut_ptr: np.ndarray,
+    lut_inputs: np.ndarray,
+    lut_offset: np.ndarray,
+    lut_table: np.ndarray
+) -> np.ndarray:
+    num_vars = len(current_state)
+    num_external = len(external_values_arr)
+
+    # Estado extendido: [internas | externas | 0], indexado directamente por lit_slot
+    slots = np.zeros(num_vars + num_external + 1, dtype=np.uint8)
+    for i in range(num_vars):
+        slots[i] = current_state[i]
+    for i in range(num_external):
+        slots[num_vars + i] = external_values_arr[i]
+
+    next_state = np.zeros_like(current_state)
+    for i in range(num_vars):
+        if lut_offset[i] >= 0:
+            # Variable tabulada: una sola lectura indexada por los bits de sus entradas
+            code = 0
+            for j in range(lut_ptr[i], lut_ptr[i + 1]):
+                code |= np.int64(slots[lut_inputs[j]]) << (j - lut_ptr[i])
+            next_state[i] = lut_table[lut_offset[i] + code]
+            continue
+
+        func_result = True
+        for c in range(var_ptr[i], var_ptr[i + 1]):
+            if not _evaluate_clause(slots, clause_ptr[c], clause_ptr[c + 1], lit_slot, lit_negated):
+                func_result = False
+                break
+        next_state[i] = 1 if func_result else 0
+    return next_state
+
+@numba.njit(cache=True)
+def _simulate(
+    initial_state: np.ndarray,
+    steps: int,
+    external_values_arr: np.ndarray,
+    var_ptr: np.ndarray,
+    clause_ptr: np.ndarray,
+    lit_slot: np.ndarray,
+    lit_negated: np.ndarray,
+    lut_ptr: np.ndarray,
+    lut_inputs: np.ndarray,
+    lut_offset: np.ndarray,
+    lut_table: np.ndarray
+) -> np.ndarray:
+    """Avanza varios pasos con entradas externas constantes y devuelve la historia completa."""
+    history = np.zeros((steps + 1, len(initial_state)), dtype=np.uint8)
+    for i in range(len(initial_state)):
+        history[0, i] = initial_state[i]
+    for t in range(steps):
+        history[t + 1] = _accelerated_next_state(
+            history[t], external_values_arr, var_ptr, clause_ptr, lit_slot, lit_negated,
+            lut_ptr, lut_inputs, lut_offset, lut_table
+        )
+    return history
+
+@numba.njit(cache=True)
+def _simulate_incremental(
+    initial_state: np.ndarray,
+    external_schedule: np.ndarray,
+    dep_ptr: np.ndarray,
+    dep_vars: np.ndarray,
+    var_ptr: np.ndarray,
+    clause_ptr: np.ndarray,
+    lit_slot: np.ndarray,
+    lit_negated: np.ndarray,
+    lut_ptr: np.ndarray,
+    lut_inputs: np.ndarray,
+    lut_offset: np.ndarray,
+    lut_table: np.ndarray
+):
+    """
+    Como _simulate, pero en cada paso solo reevalúa las variables con alguna
+    entrada que cambió (dep_vars[dep_ptr[s]:dep_ptr[s + 1]] son las variables que
+    leen la ranura s). El resto conserva su valor. external_schedule tiene forma
+    (steps, n_externas): la fila t son los valores externos del paso t, y un cambio
+    en una ranura externa marca para reevaluar a las variables que la leen.
+
+    En lugar de la historia completa devuelve el estado final y los eventos de
+    cambio (event_step[e], event_var[e]): la variable event_var[e] cambió de valor
+    al pasar del estado event_step[e] al siguiente. Tras el primer paso, el coste
+    de cada paso es proporcional al número de cambios; _replay_events reconstruye
+    los estados que se necesiten.
+    """
+    steps = external_schedule.shape[0]
+    num_external = external_schedule.shape[1]
+    num_vars = len(initial_state)
+    event_step = np.empty(max(num_vars, 1024), dtype=np.int64)
+    event_var = np.empty(max(num_vars, 1024), dtype=np.int64)
+    num_events = 0
+
+    slots = np.zeros(num_vars + num_external + 1, dtype=np.uint8)
+    for i in range(num_vars):
+        slots[i] = initial_state[i]
+    if steps > 0:
+        for e in range(num_external):
+            slots[num_vars + e] = external_schedule[0, e]
+
+    # En el primer paso se evalúan todas las variables. marked[var] == t indica
+    # que var ya está en la lista de variables a reevaluar en el paso t.
+    dirty = np.arange(num_vars)
+    num_dirty = num_vars
+    marked = np.zeros(num_vars, dtype=np.int64)
+    changed = np.empty(num_vars, dtype=np.int64)
+    new_values = np.empty(num_vars, dtype=np.uint8)
+
+    for t in range(steps):
+        for e in range(num_external):
+            slot = num_vars + e
+            if external_schedule[t, e] != slots[slot]:
+                slots[slot] = external_schedule[t, e]
+                for k in range(dep_ptr[slot], dep_ptr[slot + 1]):
+                    var = dep_vars[k]
+                    if marked[var] != t:
+                        marked[var] = t
+                        dirty[num_dirty] = var
+                        num_dirty += 1
+
+        num_changed = 0
+        for d in range(num_dirty):
+            i = dirty[d]
+            # Misma evaluación que _accelerated_next_state, escrita en línea: como función
+            # aparte, numba no la optimiza igual y el paso completo es unas 10 veces más lento.
+            if lut_offset[i] >= 0:
+                code = 0
+                for j in range(lut_ptr[i], lut_ptr[i + 1]):
+                    code |= np.int64(slots[lut_inputs[j]]) << (j - lut_ptr[i])
+                value = lut_table[lut_offset[i] + code]
+            else:
+                value = np.uint8(1)
+                for c in range(var_ptr[i], var_ptr[i + 1]):
+                    if not _evaluate_clause(slots, clause_ptr[c], clause_ptr[c + 1], lit_slot, lit_negated):
+                        value = np.uint8(0)
+                        break
+            if value != slots[i]:
+                changed[num_changed] = i
+                new_values[num_changed] = value
+                num_changed += 1
+
+        # Actualización síncrona: los cambios se aplican tras evaluar todo el paso
+        if num_events + num_changed > len(event_step):
+            capacity = max(2 * len(event_step), num_events + num_changed)
+            grown_step = np.empty(capacity, dtype=np.int64)
+            grown_var = np.empty(capacity, dtype=np.int64)
+            grown_step[:num_events] = event_step[:num_events]
+            grown_var[:num_events] = event_var[:num_events]
+            event_step, event_var = grown_step, grown_var
+        num_dirty = 0
+        for c in range(num_changed):
+            slots[changed[c]] = new_values[c]
+            event_step[num_events] = t
+            event_var[num_events] = changed[c]
+            num_events += 1
+            for k in range(dep_ptr[changed[c]], dep_ptr[changed[c] + 1]):
+                var = dep_vars[k]
+                if marked[var] != t + 1:
+                    marked[var] = t + 1
+                    dirty[num_dirty] = var
+                    num_dirty += 1
+    return slots[:num_vars].copy(), event_step[:num_events], event_var[:num_events]
+
+@numba.njit(cache=True)
+def _replay_events(
+    initial_state: np.ndarray,
+    event_step: np.ndarray,
+    event_var: np.ndarray,
+    record_steps: np.ndarray
+) -> np.ndarray:
+    """
+    Reconstruye los estados de los pasos record_steps (crecientes; 0 es el estado
+    inicial) aplicando en orden los eventos de _simulate_incremental.
+    """
+    num_vars = len(initial_state)
+    rows = np.empty((len(record_steps), num_vars), dtype=np.uint8)
+    state = np.empty(num_vars, dtype=np.uint8)
+    for i in range(num_vars):
+        state[i] = initial_state[i]
+    e = 0
+    for r in range(len(record_steps)):
+        # El estado del paso t incluye los cambios producidos en los pasos anteriores a t
+        while e < len(event_step) and event_step[e] < record_steps[r]:
+            state[event_var[e]] ^= np.uint8(1)
+            e += 1
+        rows[r] = state
+    return rows
+
+@numba.njit(cache=True)
+def _bitwise_next_state(
+    packed_state: np.ndarray,
+    external_words: np.ndarray,
+    var_ptr: np.ndarray,
+    clause_ptr: np.ndarray,
+    lit_slot: np.ndarray,
+    lit_negated: np.ndarray
+) -> np.ndarray:
+    """
+    Avanza un paso 64 trayectorias por palabra: packed_state tiene forma
+    (n_vars, n_words) y el bit b de la palabra w es el estado de la
+    trayectoria 64 * w + b.
+    """
+    num_vars, num_words = packed_state.shape
+    num_external = len(external_words)
+    next_state = np.empty_like(packed_state)
+    all_ones = ~np.uint64(0)
+
+    # Filas de ranuras extendidas: las externas valen todo unos o todo ceros
+    slots = np.zeros((num_vars + num_external + 1, num_words), dtype=np.uint64)
+    slots[:num_vars] = packed_state
+    for i in range(num_external):
+        slots[num_vars + i, :] = external_words[i]
+
+    for i in range(num_vars):
+        for w in range(num_words):
+            func_word = all_ones
+            for c in range(var_ptr[i], var_ptr[i + 1]):
+                clause_word = np.uint64(0)
+                for k in range(clause_ptr[c], clause_ptr[c + 1]):
+                    word = slots[lit_slot[k], w]
+                    if lit_negated[k]:
+                        word = ~word
+                    clause_word |= word
+                func_word &= clause_word
+                if func_word == 0:
+                    break
+            next_state[i, w] = func_word
+    return next_state
+
+@numba.njit(cache=True)
+def _hash_state(state: np.ndarray) -> np.uint64:
+    # FNV-1a sobre los valores del estado
+    h = np.uint64(14695981039346656037)
+    for v in state:
+        h ^= np.uint64(v)
+        h *= np.uint64(1099511628211)
+    return h
+
+@numba.njit(cache=True)
+def _run_until_attractor(
+    initial_state: np.ndarray,
+    external_values_arr: np.ndarray,
+    max_steps: int,
+    var_ptr: np.ndarray,
+    clause_ptr: np.ndarray,
+    lit_slot: np.ndarray,
+    lit_negated: np.ndarray,
+    lut_ptr: np.ndarray,
+    lut_inputs: np.ndarray,
+    lut_offset: np.ndarray,
+    lut_table: np.ndarray
+):
+    """
+    Simula hasta que un estado se repite, registrando los estados visitados en
+    una tabla hash de direccionamiento abierto. Devuelve (historia, inicio del
+    ciclo, longitud del ciclo); el inicio es -1 si no hay repetición en max_steps.
+    """
+    num_vars = len(initial_state)
+    capacity = 1024
+    history = np.zeros((capacity, num_vars), dtype=np.uint8)
+    hashes = np.zeros(capacity, dtype=np.uint64)
+    table = np.zeros(2 * capacity, dtype=np.int64)  # paso + 1; 0 = vacío
+    mask = np.uint64(2 * capacity - 1)
+
+    state = np.zeros(num_vars, dtype=np.uint8)
+    for i in range(num_vars):
+        state[i] = initial_state[i]
+
+    for t in range(max_steps + 1):
+        h = _hash_state(state)
+        pos = h & mask
+        while table[pos] != 0:
+            j = table[pos] - 1
+            if hashes[j] == h and np.array_equal(history[j], state):
+                return history[:t], j, t - j
+            pos = (pos + np.uint64(1)) & mask
+
+        if t == capacity:
+            # Duplicar la capacidad y redistribuir la tabla
+            capacity *= 2
+            new_history = np.zeros((capacity, num_vars), dtype=np.uint8)
+            new_history[:t] = history
+            history = new_history
+            new_hashes = np.zeros(capacity, dtype=np.uint64)
+            new_hashes[:t] = hashes
+            hashes = new_hashes
+            table = np.zeros(2 * capacity, dtype=np.int64)
+            mask = np.uint64(2 * capacity - 1)
+            for j in range(t):
+                p = hashes[j] & mask
+                while table[p] != 0:
+                    p = (p + np.uint64(1)) & mask
+                table[p] = j + 1
+            pos = h & mask
+            while table[pos] != 0:
+                pos = (pos + np.uint64(1)) & mask
+
+        table[pos] = t + 1
+        history[t] = state
+        hashes[t] = h
+        state = _accelerated_next_state(
+            state, external_values_arr, var_ptr, clause_ptr, lit_slot, lit_negated,
+            lut_ptr, lut_inputs, lut_offset, lut_table
+        )
+
+    return history[:max_steps + 1], -1, 0
+
+@numba.njit(cache=True)
+def _packed_to_codes(packed: np.ndarray, num_states: int) -> np.ndarray:
+    num_vars, num_words = packed.shape
+    codes = np.zeros(num_states, dtype=np.int32)
+    for i in range(num_vars):
+        bit = np.int32(1) << i
+        for w in range(num_words):
+            word = packed[i, w]
+            if word == 0:
+                continue
+            base = w * 64
+            for b in range(min(64, num_states - base)):
+                if (word >> np.uint64(b)) & np.uint64(1):
+                    codes[base + b] |= bit
+    return codes
+
+@numba.njit(cache=True)
+def _functional_graph_basins(successors: np.ndarray):
+    """
+    Recorre el grafo funcional s -> successors[s] y asigna a cada estado el
+    identificador de su atractor. Devuelve (basin_of, representantes), donde el
+    representante de cada atractor es el primer estado del ciclo descubierto.
+    """
+    num_states = len(successors)
+    status = np.zeros(num_states, dtype=np.uint8)  # 0: sin visitar, 1: en el camino actual, 2: resuelto
+    basin_of = np.full(num_states, -1, dtype=np.int32)
+    representatives = np.empty(num_states, dtype=np.int32)
+    path = np.empty(num_states, dtype=np.int32)
+    num_attractors = 0
+
+    for s in range(num_states):
+        if status[s] != 0:
+            continue
+        path_len = 0
+        x = s
+        while status[x] == 0:
+            status[x] = 1
+            path[path_len] = x
+            path_len += 1
+            x = successors[x]
+
+        if status[x] == 1:
+            attractor = num_attractors
+            representatives[attractor] = x
+            num_attractors += 1
+        else:
+            attractor = basin_of[x]
+
+        for k in range(path_len):
+            basin_of[path[k]] = attractor
+            status[path[k]] = 2
+
+    return basin_of, representatives[:num_attractors].copy()
+
+@numba.njit(cache=True)
+def _splitmix64(x: np.uint64) -> np.uint64:
+    x += np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+@numba.njit(cache=True)
+def _uniform(stream: np.uint64, step: int, var: int) -> float:
+    """Número uniforme en [0, 1) de un generador basado en contador (stream, paso, variable)."""
+    x = _splitmix64(stream ^ _splitmix64(np.uint64(step) * np.uint64(0x100000001B3) + np.uint64(var)))
+    return (x >> np.uint64(11)) * (1.0 / 9007199254740992.0)
+
+@numba.njit(cache=True)
+def _is_attractor_state(state: np.ndarray, attractor_hashes: np.ndarray, attractor_states: np.ndarray) -> bool:
+    h = _hash_state(state)
+    pos = np.searchsorted(attractor_hashes, h)
+    while pos < len(attractor_hashes) and attractor_hashes[pos] == h:
+        if np.array_equal(attractor_states[pos], state):
+            return True
+        pos += 1
+    return False
+
+@numba.njit(cache=True, parallel=True)
+def _noisy_ensemble(
+    initial_states: np.ndarray,
+    steps: int,
+    p_error: float,
+    streams: np.ndarray,
+    external_values_arr: np.ndarray,
+    attractor_hashes: np.ndarray,
+    attractor_states: np.ndarray,
+    var_ptr: np.ndarray,
+    clause_ptr: np.ndarray,
+    lit_slot: np.ndarray,
+    lit_negated: np.ndarray,
+    lut_ptr: np.ndarray,
+    lut_inputs: np.ndarray,
+    lut_offset: np.ndarray,
+    lut_table: np.ndarray
+):
+    """
+    Simula trayectorias independientes con ruido de inversión de bits aplicado
+    dentro del kernel y devuelve solo estadísticas por trayectoria: número de
+    tramos de permanencia, pasos en estados de atractor, primer paso en un
+    atractor (-1 si nunca) y densidad media de actividad.
+    """
+    n_trajectories, num_vars = initial_states.shape
+    n_dwells = np.zeros(n_trajectories, dtype=np.int64)
+    attractor_steps = np.zeros(n_trajectories, dtype=np.int64)
+    first_hit = np.full(n_trajectories, -1, dtype=np.int64)
+    density = np.zeros(n_trajectories, dtype=np.float64)
+
+    for n in numba.prange(n_trajectories):
+        state = initial_states[n].copy()
+        active = 0
+        dwells = 1
+        in_attractor = 0
+        if _is_attractor_state(state, attractor_hashes, attractor_states):
+            in_attractor += 1
+            first_hit[n] = 0
+        for v in range(num_vars):
+            active += state[v]
+
+        for t in range(1, steps + 1):
+            next_state = _accelerated_next_state(
+                state, external_values_arr, var_ptr, clause_ptr, lit_slot, lit_negated,
+                lut_ptr, lut_inputs, lut_offset, lut_table
+            )
+            changed = False
+            for v in range(num_vars):
+                if _uniform(streams[n], t, v) < p_error:
+                    next_state[v] = 1 - next_state[v]
+                if next_state[v] != state[v]:
+                    changed = True
+                active += next_state[v]
+            if changed:
+                dwells += 1
+            if _is_attractor_state(next_state, attractor_hashes, attractor_states):
+                in_attractor += 1
+                if first_hit[n] == -1:
+                    first_hit[n] = t
+            state = next_state
+
+        n_dwells[n] = dwells
+        attractor_steps[n] = in_attractor
+        density[n] = active / ((steps + 1) * num_vars)
+
+    return n_dwells, attractor_steps, first_hit, density
+
+
+@numba.njit(cache=True)
+def _batch_observe(
+    packed_states: np.ndarray,
+    active: np.ndarray,
+    step: int,
+    table_keys: np.ndarray,
+    table_traj: np.ndarray,
+    table_step: np.ndarray,
+    table_ref: np.ndarray,
+    state_buffer: np.ndarray,
+    n_stored: int,
+    last_seen: np.ndarray
+) -> int:
+    """
+    Registra el estado (empaquetado por bits) de cada trayectoria activa en una tabla
+    de direccionamiento abierto común con clave (trayectoria, hash del estado). Cada
+    entrada guarda en table_ref la fila de state_buffer con su estado completo, que
+    se compara cuando los hashes coinciden, así que una colisión de hash no se toma
+    por un ciclo. Los estados nuevos se copian a partir de la fila n_stored.
+    last_seen[b] recibe el paso anterior en que la trayectoria b pasó por el mismo
+    estado (-1 si es nuevo). Devuelve el número de entradas insertadas.
+    """
+    mask = np.uint64(len(table_keys) - 1)
+    n_bytes = packed_states.shape[1]
+    inserted = 0
+    for b in range(packed_states.shape[0]):
+        last_seen[b] = -1
+        if not active[b]:
+            continue
+        h = _hash_state(packed_states[b])
+        slot = (h ^ _splitmix64(np.uint64(b))) & mask
+        while table_traj[slot] != -1:
+            if table_traj[slot] == b and table_keys[slot] == h:
+                row = table_ref[slot]
+                same_state = True
+                for j in range(n_bytes):
+                    if state_buffer[row, j] != packed_states[b, j]:
+                        same_state = False
+                        break
+                if same_state:
+                    last_seen[b] = table_step[slot]
+                    break
+            slot = (slot + np.uint64(1)) & mask
+        if last_seen[b] == -1:
+            row = n_stored + inserted
+            state_buffer[row] = packed_states[b]
+            table_keys[slot] = h
+            table_traj[slot] = b
+            table_ref[slot] = row
+            inserted += 1
+        table_step[slot] = step
+    return inserted
+
+@numba.njit(cache=True)
+def _rehash_table(table_keys: np.ndarray, table_traj: np.ndarray, table_step: np.ndarray,
+                  table_ref: np.ndarray, capacity: int):
+    """Copia las entradas de la tabla de _batch_observe en una tabla de mayor capacidad (potencia de 2)."""
+    new_keys = np.zeros(capacity, dtype=np.uint64)
+    new_traj = np.full(capacity, -1, dtype=np.int64)
+    new_step = np.zeros(capacity, dtype=np.int64)
+    new_ref = np.zeros(capacity, dtype=np.int64)
+    mask = np.uint64(capacity - 1)
+    for old in range(len(table_keys)):
+        if table_traj[old] == -1:
+            continue
+        slot = (table_keys[old] ^ _splitmix64(np.uint64(table_traj[old]))) & mask
+        while new_traj[slot] != -1:
+            slot = (slot + np.uint64(1)) & mask
+        new_keys[slot] = table_keys[old]
+        new_traj[slot] = table_traj[old]
+        new_step[slot] = table_step[old]
+        new_ref[slot] = table_ref[old]
+    return new_keys, new_traj, new_step, new_ref
+
+def warmup():
+    """
+    Ejecuta cada kernel sobre una red mínima con los tipos de estado habituales
+    (int64 desde run y uint8 desde los lotes y las búsquedas de atractores), de
+    modo que numba compile o cargue de su caché todas las especializaciones.
+    """
+    rules = compile_cnf_rules([[[2]], [[-1, 3]]], external_variables=[3])
+    external_arr = np.ones(1, dtype=np.uint8)
+    for dtype in (np.int64, np.uint8):
+        state = np.array([1, 0], dtype=dtype)
+        _accelerated_next_state(state, external_arr, *rules.kernel_args())
+        _simulate(state, 2, external_arr, *rules.kernel_args())
+        final_state, event_step, event_var = _simulate_incremental(
+            state, np.ones((2, 1), dtype=np.uint8), *rules.dependency_index(), *rules.kernel_args()
+        )
+        _replay_events(state, event_step, event_var, np.arange(3))
+        _run_until_attractor(state, external_arr, 8, *rules.kernel_args())
+        _hash_state(state)
+
+    packed = _bitwise_next_state(
+        np.zeros((2, 1), dtype=np.uint64), np.full(1, ~np.uint64(0)),
+        rules.var_ptr, rules.clause_ptr, rules.lit_slot, rules.lit_negated
+    )
+    successors = _packed_to_codes(packed, 4)
+    _functional_graph_basins(successors)
+
+    initial_states = np.zeros((1, 2), dtype=np.uint8)
+    attractor_states = np.zeros((1, 2), dtype=np.uint8)
+    attractor_hashes = np.array([_hash_state(attractor_states[0])], dtype=np.uint64)
+    _noisy_ensemble(initial_states, 2, 0.1, np.zeros(1, dtype=np.uint64), external_arr,
+                    attractor_hashes, attractor_states, *rules.kernel_args())
+
+    table_keys, table_traj, table_step, table_ref = _rehash_table(
+        np.zeros(4, dtype=np.uint64), np.full(4, -1, dtype=np.int64), np.zeros(4, dtype=np.int64),
+        np.zeros(4, dtype=np.int64), 8
+    )
+    _batch_observe(initial_states, np.ones(1, dtype=np.bool_), 0, table_keys, table_traj, table_step, table_ref,
+                   np.zeros((1, 2), dtype=np.uint8), 0, np.empty(1, dtype=np.int64))
@@ -0,0 +1,111 @@
+# cbn_neuroscience/core/cbn_io.py
+
+import struct
+import zipfile
+
+import numpy as np
+from cbn_neuroscience.core.compiled_rules import CompiledRules
+from cbn_neuroscience.core.cbn_simulator import CompiledCBN, compile_cbn
+
+_FORMAT_VERSION = 1
+_RULE_ARRAYS = ('var_ptr', 'clause_ptr', 'lit_slot', 'lit_negated', 'lut_ptr', 'lut_inputs', 'lut_offset', 'lut_table')
+
+def save_cbn(cbn, path: str, max_lut_fan_in: int = 10):
+    """
+    Guarda una CBN compilada en un único archivo .npz sin comprimir: los arreglos
+    de reglas, las redes, los ejes con sus funciones de acoplamiento (ya compiladas
+    como variables de señal) y el mapa de capas común.
+
+    Args:
+        cbn (CBN | CompiledCBN): La red a guardar; una CBN se compila antes.
+        path (str): Ruta del archivo.
+        max_lut_fan_in (int): Límite de tabulación al compilar una CBN.
+    """
+    compiled = cbn if isinstance(cbn, CompiledCBN) else compile_cbn(cbn, max_lut_fan_in)
+    rules = compiled.rules
+    layer_names = list(compiled.layer_map)
+    layer_positions = [np.asarray(compiled.layer_map[name], dtype=np.int64) for name in layer_names]
+
+    with open(path, 'wb') as f:  # Con un objeto archivo, np.savez no añade la extensión .npz
+        np.savez(
+            f,
+            format_version=np.int64(_FORMAT_VERSION),
+            n_internal=np.int64(rules.n_internal),
+            network_indices=compiled.network_indices,
+            network_ptr=compiled.network_ptr,
+            signal_variables=compiled.signal_variables,
+            edge_networks=compiled.edge_networks,
+            layer_names=np.array(layer_names, dtype=str),
+            layer_ptr=np.cumsum([0] + [len(p) for p in layer_positions], dtype=np.int64),
+            layer_positions=np.concatenate(layer_positions) if layer_positions else np.zeros(0, dtype=np.int64),
+            **{name: getattr(rules, name) for name in _RULE_ARRAYS}
+        )
+
+
+def _memmap_npz(path: str) -> dict:
+    """
+    Abre cada arreglo de un .npz sin comprimir como np.memmap de solo lectura,
+    sin copiar datos: se localiza el inicio de cada miembro del zip y se salta
+    su cabecera .npy.
+    """
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, 'rb') as f:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"El miembro {info.filename} está comprimido y no puede mapearse en memoria.")
+            # Cabecera local del zip: 30 bytes fijos, nombre y campo extra
+            f.seek(info.header_offset + 26)
+            name_length, extra_length = struct.unpack('<HH', f.read(4))
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            name = info.filename[:-len('.npy')]
+            if int(np.prod(shape)) == 0:
+                arrays[name] = np.zeros(shape, dtype=dtype)
+            else:
+                arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=f.tell(), shape=shape,
+                                         order='F' if fortran_order else 'C')
+    return arrays
+
+
+def load_cbn(path: str, mmap: bool = True) -> CompiledCBN:
+    """
+    Carga una CBN guardada con save_cbn, lista para CBNSimulator.
+
+    Args:
+        path (str): Ruta del archivo.
+        mmap (bool): Si es True, los arreglos se mapean en memoria (solo lectura) en
+                     lugar de leerse: la carga no copia datos y las páginas se leen
+                     del disco a medida que los kernels las usan.
+
+    Returns:
+        CompiledCBN: La CBN compilada.
+    """
+    if mmap:
+        arrays = _memmap_npz(path)
+    else:
+        with np.load(path) as data:
+            arrays = {name: data[name] for name in data.files}
+
+    if int(arrays['format_version']) != _FORMAT_VERSION:
+        raise ValueError(f"Versión de formato no soportada: {int(arrays['format_version'])}.")
+
+    rules = CompiledRules(n_internal=int(arrays['n_internal']), external_keys=[],
+                          **{name: arrays[name] for name in _RULE_ARRAYS})
+    layer_ptr = arrays['layer_ptr']
+    layer_map = {
+        str(name): arrays['layer_positions'][layer_ptr[k]:layer_ptr[k + 1]].tolist()
+        for k, name in enumerate(arrays['layer_names'])
+    }
+    return CompiledCBN(
+        rules=rules,
+        network_indices=arrays['network_indices'],
+        network_ptr=arrays['network_ptr'],
+        signal_variables=arrays['signal_variables'],
+        edge_networks=arrays['edge_networks'],
+        layer_map=layer_map
+    )
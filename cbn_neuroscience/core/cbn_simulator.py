@@ -0,0 +1,218 @@
+# cbn_neuroscience/core/cbn_simulator.py
+
+import numpy as np
+from cbnetwork.cbnetwork import CBN
+from cbnetwork.directededge import DirectedEdge
+from cbn_neuroscience.core.compiled_rules import (
+    CompiledRules, compile_cnf_rules, concatenate_rules, _build_truth_tables
+)
+from cbn_neuroscience.core.simulation import (
+    load_kernels, pack_states, unpack_states
+)
+
+def _coupling_table(edge: DirectedEdge) -> np.ndarray:
+    """
+    Tabla de verdad de la función de acoplamiento de un eje: el bit j del índice
+    es el valor de la j-ésima variable de salida.
+    """
+    table = np.zeros(1 << len(edge.l_output_variables), dtype=np.uint8)
+    for combination, value in edge.true_table.items():
+        code = sum(int(bit) << j for j, bit in enumerate(combination))
+        table[code] = int(value)
+    return table
+
+def _compile_signals(edges: list, output_slots: list, max_lut_fan_in: int) -> CompiledRules:
+    """
+    Compila las señales de acoplamiento como variables booleanas cuya CNF es el
+    producto de los maxtérminos de su tabla de verdad; las ranuras ya son globales.
+    """
+    var_ptr = np.zeros(len(edges) + 1, dtype=np.int32)
+    clause_ptr = [0]
+    lit_slot = []
+    lit_negated = []
+    for s, (edge, inputs) in enumerate(zip(edges, output_slots)):
+        for code in np.flatnonzero(_coupling_table(edge) == 0):
+            # Cláusula que solo es falsa en esta combinación de salidas
+            for j, slot in enumerate(inputs):
+                lit_slot.append(slot)
+                lit_negated.append((code >> j) & 1)
+            clause_ptr.append(len(lit_slot))
+        var_ptr[s + 1] = len(clause_ptr) - 1
+
+    clause_ptr = np.array(clause_ptr, dtype=np.int32)
+    lit_slot = np.array(lit_slot, dtype=np.int32)
+    lit_negated = np.array(lit_negated, dtype=np.uint8)
+    lut_ptr, lut_inputs, lut_offset, lut_table = _build_truth_tables(
+        var_ptr, clause_ptr, lit_slot, lit_negated, max_lut_fan_in
+    )
+    return CompiledRules(var_ptr, clause_ptr, lit_slot, lit_negated, len(edges), [],
+                         lut_ptr, lut_inputs, lut_offset, lut_table)
+
+
+class CompiledCBN:
+    """
+    Una CBN completa aplanada en un único conjunto de reglas compiladas.
+
+    El estado global es [variables internas de todas las redes | señales de
+    acoplamiento]: las variables de la red k ocupan network_ptr[k]:network_ptr[k + 1]
+    y la señal del eje e ocupa n_internal + e.
+
+    edge_networks[e] = (red de entrada, red de salida) del eje e y layer_map es el
+    mapa de capas común a todas las redes (como el de una plantilla), si existe.
+    """
+    def __init__(self, rules: CompiledRules, network_indices: np.ndarray, network_ptr: np.ndarray,
+                 signal_variables: np.ndarray, edge_networks: np.ndarray = None, layer_map: dict = None):
+        self.rules = rules
+        self.network_indices = network_indices
+        self.network_ptr = network_ptr
+        self.signal_variables = signal_variables
+        self.edge_networks = edge_networks if edge_networks is not None else np.zeros((0, 2), dtype=np.int64)
+        self.layer_map = layer_map or {}
+
+    @property
+    def n_internal(self) -> int:
+        return int(self.network_ptr[-1])
+
+    @property
+    def n_signals(self) -> int:
+        return len(self.signal_variables)
+
+    @property
+    def n_state(self) -> int:
+        return self.n_internal + self.n_signals
+
+
+def _common_layer_map(networks: list) -> dict:
+    """Devuelve el mapa de capas si todas las redes comparten el mismo (p. ej. el de su plantilla)."""
+    layer_map = getattr(networks[0], 'layer_map', None) if networks else None
+    if layer_map is None or any(getattr(net, 'layer_map', None) is not layer_map and
+                                getattr(net, 'layer_map', None) != layer_map for net in networks):
+        return None
+    return layer_map
+
+
+def compile_cbn(cbn: CBN, max_lut_fan_in: int = 10) -> CompiledCBN:
+    """
+    Compila todas las redes locales y funciones de acoplamiento de la CBN.
+
+    Los literales de cada red se resuelven como en Simulator (posición interna o
+    variable externa) y sus variables externas se conectan a la ranura de la señal
+    del eje correspondiente.
+    """
+    networks = cbn.l_local_networks
+    edges = cbn.l_directed_edges
+
+    network_ptr = np.zeros(len(networks) + 1, dtype=np.int64)
+    for k, network in enumerate(networks):
+        network_ptr[k + 1] = network_ptr[k] + len(network.internal_variables)
+    n_internal = int(network_ptr[-1])
+    zero_slot = n_internal + len(edges)
+
+    signal_slot = {edge.index_variable: n_internal + e for e, edge in enumerate(edges)}
+    variable_slot = {}
+    for k, network in enumerate(networks):
+        for p, var_index in enumerate(network.internal_variables):
+            variable_slot[var_index] = network_ptr[k] + p
+
+    parts = []
+    for k, network in enumerate(networks):
+        variables = sorted(network.descriptive_function_variables, key=lambda var: var.index)
+        shared_dynamics = getattr(network, 'shared_dynamics', None)
+        if any(callable(var.cnf_function) for var in variables):
+            raise ValueError(f"La red {network.index} tiene funciones CNF dinámicas; CBNSimulator solo admite CNF estáticas.")
+        if shared_dynamics is not None and not variables:
+            rules = shared_dynamics.compile(network.external_variables, max_lut_fan_in)
+        else:
+            rules = compile_cnf_rules([var.cnf_function for var in variables], network.external_variables,
+                                      max_lut_fan_in=max_lut_fan_in)
+        slot_map = np.concatenate([
+            np.arange(network_ptr[k], network_ptr[k + 1]),
+            [signal_slot.get(var, zero_slot) for var in rules.external_keys],
+            [zero_slot]
+        ])
+        parts.append((rules, slot_map))
+
+    output_slots = [[variable_slot[var] for var in edge.l_output_variables] for edge in edges]
+    signal_rules = _compile_signals(edges, output_slots, max_lut_fan_in)
+    parts.append((signal_rules, np.arange(zero_slot + 1)))  # Ranuras ya globales
+
+    return CompiledCBN(
+        rules=concatenate_rules(parts, external_keys=[]),
+        network_indices=np.array([network.index for network in networks], dtype=np.int64),
+        network_ptr=network_ptr,
+        signal_variables=np.array([edge.index_variable for edge in edges], dtype=np.int64),
+        edge_networks=np.array([[edge.input_local_network, edge.output_local_network] for edge in edges],
+                               dtype=np.int64).reshape(-1, 2),
+        layer_map=_common_layer_map(networks)
+    )
+
+
+class CBNSimulator:
+    """
+    Simula una CBN completa en un único kernel compilado: cada paso evalúa a la
+    vez todas las redes locales y todas las funciones de acoplamiento.
+
+    Las señales son variables del estado global que se actualizan de forma
+    síncrona: su valor en t + 1 es la función de acoplamiento de las salidas en t.
+    """
+    def __init__(self, cbn, max_lut_fan_in: int = 10):
+        self.compiled = cbn if isinstance(cbn, CompiledCBN) else compile_cbn(cbn, max_lut_fan_in)
+        self.rules = self.compiled.rules
+        self._no_external = np.zeros(0, dtype=np.uint8)
+
+    def network_slice(self, network_index: int) -> slice:
+        """Devuelve el rango del estado global que ocupa una red local."""
+        k = int(np.flatnonzero(self.compiled.network_indices == network_index)[0])
+        return slice(int(self.compiled.network_ptr[k]), int(self.compiled.network_ptr[k + 1]))
+
+    def _full_state(self, state: np.ndarray) -> np.ndarray:
+        """Completa un estado con solo variables internas calculando sus señales de acoplamiento."""
+        state = np.asarray(state)
+        if len(state) == self.compiled.n_state:
+            return state
+        if len(state) != self.compiled.n_internal:
+            raise ValueError("El tamaño del estado no coincide con el número de variables de la CBN.")
+        full_state = np.concatenate([state, np.zeros(self.compiled.n_signals, dtype=state.dtype)])
+        next_state = load_kernels()._accelerated_next_state(full_state, self._no_external, *self.rules.kernel_args())
+        full_state[self.compiled.n_internal:] = next_state[self.compiled.n_internal:]
+        return full_state
+
+    def run(self, initial_state: np.ndarray, steps: int) -> np.ndarray:
+        """
+        Args:
+            initial_state (np.ndarray): Estado global (n_state,) o solo las variables
+                                        internas (n_internal,).
+            steps (int): Número de pasos a simular.
+
+        Returns:
+            np.ndarray: La historia del estado global, de forma (steps + 1, n_state).
+        """
+        history = load_kernels()._simulate(self._full_state(initial_state), steps, self._no_external, *self.rules.kernel_args())
+        return history.astype(int)
+
+    def run_batch(self, initial_states: np.ndarray, steps: int) -> np.ndarray:
+        """Avanza un lote (batch, n_state) de estados globales en modo bit a bit y devuelve los finales."""
+        rules = self.rules
+        packed = pack_states(np.array([self._full_state(state) for state in np.atleast_2d(initial_states)]))
+        external_words = np.zeros(0, dtype=np.uint64)
+        for _ in range(steps):
+            packed = load_kernels()._bitwise_next_state(
+                packed, external_words, rules.var_ptr, rules.clause_ptr, rules.lit_slot, rules.lit_negated
+            )
+        return unpack_states(packed, len(np.atleast_2d(initial_states)))
+
+    def run_until_attractor(self, initial_state: np.ndarray, max_steps: int = 100000) -> tuple[int, np.ndarray, int]:
+        """
+        Simula la CBN completa hasta entrar en un atractor global.
+
+        Returns:
+            tuple[int, np.ndarray, int]: Longitud del transitorio, estados globales del
+                                         ciclo y longitud del ciclo ((-1, vacío, 0) si no
+                                         se alcanza en max_steps).
+        """
+        history, cycle_start, cycle_length = load_kernels()._run_until_attractor(
+            self._full_state(initial_state), self._no_external, max_steps, *self.rules.kernel_args()
+        )
+        if cycle_start == -1:
+            return -1, np.zeros((0, self.compiled.n_state), dtype=int), 0
+        return cycle_start, history[cycle_start:cycle_start + cycle_length].astype(int), cycle_length
@@ -0,0 +1,321 @@
+# cbn_neuroscience/core/compiled_rules.py
+
+import hashlib
+
+import numpy as np
+
+class CompiledRules:
+    """
+    Reglas CNF de una red local compiladas en arreglos planos tipo CSR.
+
+    Las cláusulas de la variable i ocupan clause_ptr[var_ptr[i]:var_ptr[i + 1]] y
+    los literales de la cláusula c ocupan lit_slot[clause_ptr[c]:clause_ptr[c + 1]].
+    Cada literal apunta a una ranura densa del estado extendido:
+    [variables internas (n_internal) | variables externas (n_external) | cero].
+
+    Las variables con pocas entradas distintas tienen además una tabla de verdad:
+    sus ranuras de entrada ocupan lut_inputs[lut_ptr[i]:lut_ptr[i + 1]] y su tabla
+    empieza en lut_table[lut_offset[i]] (-1 si la variable no tiene tabla).
+    """
+    def __init__(self, var_ptr: np.ndarray, clause_ptr: np.ndarray, lit_slot: np.ndarray,
+                 lit_negated: np.ndarray, n_internal: int, external_keys: list,
+                 lut_ptr: np.ndarray, lut_inputs: np.ndarray, lut_offset: np.ndarray, lut_table: np.ndarray):
+        self.var_ptr = var_ptr
+        self.clause_ptr = clause_ptr
+        self.lit_slot = lit_slot
+        self.lit_negated = lit_negated
+        self.n_internal = n_internal
+        self.external_keys = external_keys
+        self.n_external = len(external_keys)
+        self.lut_ptr = lut_ptr
+        self.lut_inputs = lut_inputs
+        self.lut_offset = lut_offset
+        self.lut_table = lut_table
+        self._dependency_index = None
+
+    def kernel_args(self) -> tuple:
+        """Arreglos en el orden que esperan los kernels de simulación."""
+        return (self.var_ptr, self.clause_ptr, self.lit_slot, self.lit_negated,
+                self.lut_ptr, self.lut_inputs, self.lut_offset, self.lut_table)
+
+    @property
+    def n_slots(self) -> int:
+        """Tamaño del estado extendido, incluida la ranura constante a cero."""
+        return self.n_internal + self.n_external + 1
+
+    @property
+    def zero_slot(self) -> int:
+        return self.n_internal + self.n_external
+
+    def external_array(self, external_values: dict) -> np.ndarray:
+        """Ordena los valores externos según las ranuras de estas reglas."""
+        return np.array([external_values.get(k, 0) for k in self.external_keys], dtype=np.uint8)
+
+    def dependency_index(self) -> tuple:
+        """
+        Índice inverso (dep_ptr, dep_vars): dep_vars[dep_ptr[s]:dep_ptr[s + 1]] son
+        las variables cuya función lee la ranura s. Se construye en el primer uso.
+        """
+        if self._dependency_index is None:
+            self._dependency_index = _build_dependency_index(
+                self.var_ptr, self.clause_ptr, self.lit_slot, self.n_slots
+            )
+        return self._dependency_index
+
+    def fingerprint(self, external: np.ndarray = None) -> str:
+        """
+        Hash SHA-256 canónico de las cláusulas compiladas y de los valores de las
+        variables externas restantes. No depende de las tablas de verdad, por lo que
+        dos simuladores de la misma red con distinto max_lut_fan_in coinciden.
+        """
+        digest = hashlib.sha256()
+        digest.update(np.int64([self.n_internal, self.n_external]).tobytes())
+        for array in (self.var_ptr, self.clause_ptr, self.lit_slot, self.lit_negated):
+            digest.update(np.ascontiguousarray(array, dtype=np.int64).tobytes())
+        if external is not None:
+            digest.update(np.ascontiguousarray(external, dtype=np.uint8).tobytes())
+        return digest.hexdigest()
+
+    def extended_state(self, state: np.ndarray, external: np.ndarray) -> np.ndarray:
+        """Construye el vector de ranuras [estado | externas | 0] que leen los kernels."""
+        values = np.zeros(self.n_slots, dtype=np.uint8)
+        values[:self.n_internal] = state
+        values[self.n_internal:self.zero_slot] = external
+        return values
+
+
+def _build_dependency_index(var_ptr: np.ndarray, clause_ptr: np.ndarray, lit_slot: np.ndarray,
+                            n_slots: int) -> tuple:
+    """Invierte la relación variable -> ranuras de entrada en formato CSR por ranura."""
+    # Los literales de cada variable son contiguos y están en orden de variable
+    lit_counts = np.diff(clause_ptr[var_ptr])
+    readers = np.repeat(np.arange(len(var_ptr) - 1), lit_counts)
+    slots = lit_slot[:len(readers)]
+
+    # Pares (ranura, variable) únicos, ordenados por ranura
+    pairs = np.unique(np.stack([slots, readers], axis=1).reshape(-1, 2), axis=0)
+    dep_ptr = np.zeros(n_slots + 1, dtype=np.int32)
+    np.cumsum(np.bincount(pairs[:, 0], minlength=n_slots), out=dep_ptr[1:])
+    return dep_ptr, pairs[:, 1].astype(np.int32)
+
+
+def _build_truth_tables(var_ptr: np.ndarray, clause_ptr: np.ndarray, lit_slot: np.ndarray,
+                        lit_negated: np.ndarray, max_fan_in: int) -> tuple:
+    """
+    Tabula las variables cuyo número de ranuras de entrada distintas es <= max_fan_in.
+    La entrada j de la variable aporta el bit j del índice de su tabla.
+    """
+    n_vars = len(var_ptr) - 1
+    lut_ptr = np.zeros(n_vars + 1, dtype=np.int32)
+    lut_offset = np.full(n_vars, -1, dtype=np.int64)
+    lut_inputs = []
+    lut_tables = []
+    table_size = 0
+
+    for i in range(n_vars):
+        lit_start, lit_end = clause_ptr[var_ptr[i]], clause_ptr[var_ptr[i + 1]]
+        inputs = np.unique(lit_slot[lit_start:lit_end])
+        if len(inputs) <= max_fan_in:
+            # Todas las combinaciones de las entradas: bits[code, j] = bit j de code
+            codes = np.arange(1 << len(inputs))
+            bits = (codes[:, None] >> np.arange(len(inputs))) & 1
+            table = np.ones(len(codes), dtype=bool)
+            for c in range(var_ptr[i], var_ptr[i + 1]):
+                positions = np.searchsorted(inputs, lit_slot[clause_ptr[c]:clause_ptr[c + 1]])
+                negated = lit_negated[clause_ptr[c]:clause_ptr[c + 1]]
+                table &= np.any(bits[:, positions] != negated, axis=1)
+            lut_inputs.append(inputs)
+            lut_tables.append(table)
+            lut_offset[i] = table_size
+            table_size += len(table)
+        lut_ptr[i + 1] = lut_ptr[i] + (len(inputs) if lut_offset[i] >= 0 else 0)
+
+    lut_inputs = np.concatenate(lut_inputs).astype(np.int32) if lut_inputs else np.zeros(0, dtype=np.int32)
+    lut_table = np.concatenate(lut_tables).astype(np.uint8) if lut_tables else np.zeros(0, dtype=np.uint8)
+    return lut_ptr, lut_inputs, lut_offset, lut_table
+
+
+def compile_cnf_rules(cnf_functions: list, external_variables: list, constants: dict = None,
+                      max_lut_fan_in: int = 10) -> CompiledRules:
+    """
+    Compila una lista de funciones CNF (una por variable interna, en orden de
+    posición) al formato CSR de CompiledRules.
+
+    Los literales con índice <= n_internal se refieren a la variable interna en esa
+    posición; el resto se buscan entre las variables externas ordenadas y, si no
+    existen, se leen de la ranura constante a cero.
+
+    Args:
+        cnf_functions (list): Funciones CNF estáticas (listas de cláusulas).
+        external_variables (list): Índices de las variables externas de la red.
+        constants (dict, optional): Valores fijos de variables externas. Sus literales
+                                    se pliegan durante la compilación: una cláusula con
+                                    un literal verdadero se elimina y los literales
+                                    falsos se descartan.
+        max_lut_fan_in (int): Las variables con hasta este número de entradas distintas
+                              se compilan además a una tabla de verdad.
+
+    Returns:
+        CompiledRules: Las reglas en formato plano.
+    """
+    n_internal = len(cnf_functions)
+    constants = constants or {}
+    external_keys = sorted(var for var in external_variables if var not in constants)
+    n_external = len(external_keys)
+    external_slots = {var: n_internal + pos for pos, var in enumerate(external_keys)}
+    zero_slot = n_internal + n_external
+
+    var_ptr = np.zeros(n_internal + 1, dtype=np.int32)
+    clause_ptr = [0]
+    lit_slot = []
+    lit_negated = []
+
+    for i, cnf_function in enumerate(cnf_functions):
+        for clause in cnf_function or []:
+            clause_start = len(lit_slot)
+            satisfied = False
+            for literal in clause:
+                var_index = abs(literal)
+                if var_index <= n_internal:
+                    lit_slot.append(var_index - 1)
+                elif var_index in constants:
+                    if (constants[var_index] == 1) != (literal < 0):
+                        satisfied = True
+                        break
+                    continue
+                else:
+                    lit_slot.append(external_slots.get(var_index, zero_slot))
+                lit_negated.append(literal < 0)
+            if satisfied:
+                # La cláusula es siempre verdadera y no afecta a la conjunción
+                del lit_slot[clause_start:], lit_negated[clause_start:]
+                continue
+            clause_ptr.append(len(lit_slot))
+        var_ptr[i + 1] = len(clause_ptr) - 1
+
+    clause_ptr = np.array(clause_ptr, dtype=np.int32)
+    lit_slot = np.array(lit_slot, dtype=np.int32)
+    lit_negated = np.array(lit_negated, dtype=np.uint8)
+    if max_lut_fan_in >= 0:
+        lut_ptr, lut_inputs, lut_offset, lut_table = _build_truth_tables(
+            var_ptr, clause_ptr, lit_slot, lit_negated, max_lut_fan_in
+        )
+    else:
+        # Sin tablas de verdad: todas las variables usan el evaluador de cláusulas
+        lut_ptr, lut_inputs = np.zeros(n_internal + 1, dtype=np.int32), np.zeros(0, dtype=np.int32)
+        lut_offset, lut_table = np.full(n_internal, -1, dtype=np.int64), np.zeros(0, dtype=np.uint8)
+
+    return CompiledRules(
+        var_ptr=var_ptr,
+        clause_ptr=clause_ptr,
+        lit_slot=lit_slot,
+        lit_negated=lit_negated,
+        n_internal=n_internal,
+        external_keys=external_keys,
+        lut_ptr=lut_ptr,
+        lut_inputs=lut_inputs,
+        lut_offset=lut_offset,
+        lut_table=lut_table
+    )
+
+
+def concatenate_rules(parts: list, external_keys: list) -> CompiledRules:
+    """
+    Une varios bloques de reglas compiladas en un único conjunto, reubicando sus
+    ranuras en un estado extendido común.
+
+    Args:
+        parts (list): Pares (CompiledRules, slot_map), donde slot_map[i] es la ranura
+                      global de la ranura local i del bloque.
+        external_keys (list): Variables externas del conjunto resultante.
+
+    Returns:
+        CompiledRules: Las reglas concatenadas, con las variables en el orden de los bloques.
+    """
+    var_ptr, clause_ptr, lit_slot, lit_negated = [np.zeros(1, dtype=np.int32)], [np.zeros(1, dtype=np.int32)], [], []
+    lut_ptr, lut_inputs, lut_offset, lut_table = [np.zeros(1, dtype=np.int32)], [], [], []
+    n_clauses = n_literals = n_lut_inputs = n_table = n_internal = 0
+
+    for rules, slot_map in parts:
+        slot_map = np.asarray(slot_map, dtype=np.int32)
+        var_ptr.append(rules.var_ptr[1:] + n_clauses)
+        clause_ptr.append(rules.clause_ptr[1:] + n_literals)
+        lit_slot.append(slot_map[rules.lit_slot])
+        lit_negated.append(rules.lit_negated)
+        lut_ptr.append(rules.lut_ptr[1:] + n_lut_inputs)
+        lut_inputs.append(slot_map[rules.lut_inputs])
+        lut_offset.append(np.where(rules.lut_offset >= 0, rules.lut_offset + n_table, -1))
+        lut_table.append(rules.lut_table)
+
+        n_clauses += len(rules.clause_ptr) - 1
+        n_literals += len(rules.lit_slot)
+        n_lut_inputs += len(rules.lut_inputs)
+        n_table += len(rules.lut_table)
+        n_internal += rules.n_internal
+
+    return CompiledRules(
+        var_ptr=np.concatenate(var_ptr).astype(np.int32),
+        clause_ptr=np.concatenate(clause_ptr).astype(np.int32),
+        lit_slot=np.concatenate(lit_slot).astype(np.int32) if lit_slot else np.zeros(0, dtype=np.int32),
+        lit_negated=np.concatenate(lit_negated).astype(np.uint8) if lit_negated else np.zeros(0, dtype=np.uint8),
+        n_internal=n_internal,
+        external_keys=external_keys,
+        lut_ptr=np.concatenate(lut_ptr).astype(np.int32),
+        lut_inputs=np.concatenate(lut_inputs).astype(np.int32) if lut_inputs else np.zeros(0, dtype=np.int32),
+        lut_offset=np.concatenate(lut_offset).astype(np.int64) if lut_offset else np.zeros(0, dtype=np.int64),
+        lut_table=np.concatenate(lut_table).astype(np.uint8) if lut_table else np.zeros(0, dtype=np.uint8)
+    )
+
+
+def _gather_ranges(starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Concatena los rangos [starts[i], starts[i] + counts[i]) sin bucles de Python."""
+    counts = np.asarray(counts, dtype=np.int64)
+    ends = np.cumsum(counts)
+    return np.repeat(np.asarray(starts, dtype=np.int64) - ends + counts, counts) + np.arange(ends[-1] if len(ends) else 0)
+
+
+def splice_rules(base: CompiledRules, positions: np.ndarray, replacement: CompiledRules) -> CompiledRules:
+    """
+    Sustituye las funciones de las variables positions de base por las de esas
+    mismas variables en replacement (ambas reglas sobre las mismas ranuras). Las
+    variables sustituidas pierden su tabla de verdad y se evalúan por cláusulas;
+    las demás conservan la suya.
+
+    Args:
+        base (CompiledRules): Las reglas de partida.
+        positions (np.ndarray): Posiciones de las variables a sustituir.
+        replacement (CompiledRules): Reglas con las nuevas funciones en esas posiciones.
+
+    Returns:
+        CompiledRules: Las reglas combinadas.
+    """
+    positions = np.asarray(positions, dtype=np.int64)
+
+    # Cláusulas de cada variable dentro de las cláusulas de base seguidas de las de replacement
+    clause_start = base.var_ptr[:-1].astype(np.int64)
+    clause_count = np.diff(base.var_ptr).astype(np.int64)
+    clause_start[positions] = replacement.var_ptr[positions] + len(base.clause_ptr) - 1
+    clause_count[positions] = replacement.var_ptr[positions + 1] - replacement.var_ptr[positions]
+    clause_order = _gather_ranges(clause_start, clause_count)
+
+    lit_start = np.concatenate([base.clause_ptr[:-1], replacement.clause_ptr[:-1] + len(base.lit_slot)])
+    lit_count = np.concatenate([np.diff(base.clause_ptr), np.diff(replacement.clause_ptr)])[clause_order]
+    lit_order = _gather_ranges(lit_start[clause_order], lit_count)
+
+    lut_count = np.diff(base.lut_ptr).astype(np.int64)
+    lut_count[positions] = 0
+    lut_offset = base.lut_offset.copy()
+    lut_offset[positions] = -1
+
+    return CompiledRules(
+        var_ptr=np.concatenate([[0], np.cumsum(clause_count)]).astype(np.int32),
+        clause_ptr=np.concatenate([[0], np.cumsum(lit_count)]).astype(np.int32),
+        lit_slot=np.concatenate([base.lit_slot, replacement.lit_slot])[lit_order].astype(np.int32),
+        lit_negated=np.concatenate([base.lit_negated, replacement.lit_negated])[lit_order].astype(np.uint8),
+        n_internal=base.n_internal,
+        external_keys=base.external_keys,
+        lut_ptr=np.concatenate([[0], np.cumsum(lut_count)]).astype(np.int32),
+        lut_inputs=base.lut_inputs[_gather_ranges(base.lut_ptr[:-1], lut_count)].astype(np.int32),
+        lut_offset=lut_offset,
+        lut_table=base.lut_table
+    )
@@ -2,13 +2,109 @@
 
 import numpy as np
 
+class SparseWeights:
+    """
+    Matriz de pesos dispersa en formato COO: arreglos de filas (destinos), columnas
+    (fuentes) y valores, ordenados por la clave lineal fila * n_columnas + columna.
+    Cada peso ocupa 16 bytes (clave y valor) y la memoria crece con el número de
+    pesos definidos, no con el cuadrado del número de capas. Las entradas puntuales
+    se localizan por búsqueda binaria sobre las claves; las no definidas valen 0.
+    """
+    def __init__(self, shape: tuple, row: np.ndarray = None, col: np.ndarray = None, data: np.ndarray = None):
+        self.shape = shape
+        self._keys = np.zeros(0, dtype=np.int64)
+        self.data = np.zeros(0, dtype=float)
+        if row is not None:
+            self.set(row, col, data)
+
+    @property
+    def row(self) -> np.ndarray:
+        return self._keys // self.shape[1]
+
+    @property
+    def col(self) -> np.ndarray:
+        return self._keys % self.shape[1]
+
+    @property
+    def nnz(self) -> int:
+        """Número de pesos almacenados."""
+        return len(self._keys)
+
+    def _locate(self, row, col) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Claves de las entradas, su posición en los arreglos y si ya están definidas."""
+        keys = np.atleast_1d(np.asarray(row, dtype=np.int64) * self.shape[1] + np.asarray(col, dtype=np.int64))
+        positions = np.searchsorted(self._keys, keys)
+        found = positions < len(self._keys)
+        found[found] = self._keys[positions[found]] == keys[found]
+        return keys, positions, found
+
+    def get(self, row: np.ndarray, col: np.ndarray) -> np.ndarray:
+        """Obtiene en bloque los pesos de las entradas (row[k], col[k])."""
+        _, positions, found = self._locate(row, col)
+        values = np.zeros(len(positions))
+        values[found] = self.data[positions[found]]
+        return values
+
+    def set(self, row: np.ndarray, col: np.ndarray, values: np.ndarray):
+        """
+        Actualiza en bloque los pesos de las entradas (row[k], col[k]). Las entradas
+        nuevas se insertan; si una entrada se repite, prevalece su último valor.
+        """
+        keys, positions, found = self._locate(row, col)
+        values = np.broadcast_to(np.asarray(values, dtype=float), keys.shape)
+        self.data[positions[found]] = values[found]
+        if found.all():
+            return
+        # Entradas nuevas, sin repetir (el último valor de cada clave) y fusionadas en orden
+        new_keys, last = np.unique(keys[~found][::-1], return_index=True)
+        merged_keys = np.concatenate([self._keys, new_keys])
+        merged_data = np.concatenate([self.data, values[~found][::-1][last]])
+        order = np.argsort(merged_keys, kind='stable')
+        self._keys, self.data = merged_keys[order], merged_data[order]
+
+    def __getitem__(self, key: tuple) -> float:
+        _, positions, found = self._locate(*key)
+        return float(self.data[positions[0]]) if found[0] else 0.0
+
+    def __setitem__(self, key: tuple, value: float):
+        self.set(*key, value)
+
+    def copy(self) -> 'SparseWeights':
+        weights = SparseWeights(self.shape)
+        weights._keys, weights.data = self._keys.copy(), self.data.copy()
+        return weights
+
+    def tocsr(self):
+        """Convierte los pesos en un scipy.sparse.csr_array."""
+        from scipy import sparse
+        return sparse.csr_array((self.data, (self.row, self.col)), shape=self.shape)
+
+    def toarray(self) -> np.ndarray:
+        dense = np.zeros(self.shape)
+        dense[self.row, self.col] = self.data
+        return dense
+
+
 class ConnectionManager:
     """
     Gestiona la conectividad y los pesos dinámicos de la red.
     """
-    def __init__(self, columns, coupling_rules):
+    WEIGHT_BACKENDS = ('dense', 'sparse')
+
+    def __init__(self, columns, coupling_rules, weight_backend: str = 'dense'):
+        """
+        Args:
+            columns: Las columnas de la red.
+            coupling_rules: Las reglas de acoplamiento entre capas.
+            weight_backend (str): 'dense' guarda los pesos en una matriz numpy
+                                  (num_layers, num_layers); 'sparse' los guarda en formato
+                                  COO (SparseWeights), con memoria proporcional a las reglas.
+        """
+        if weight_backend not in self.WEIGHT_BACKENDS:
+            raise ValueError(f"Backend de pesos desconocido: '{weight_backend}'. Opciones: {self.WEIGHT_BACKENDS}.")
         self.columns = columns
         self.coupling_rules = coupling_rules
+        self.weight_backend = weight_backend
 
         # Crear un mapa de 'capa_global' a índice para la matriz de pesos
         self.layer_map = {}
@@ -19,7 +115,10 @@ class ConnectionManager:
                 idx += 1
 
         num_layers = len(self.layer_map)
-        self.weights = np.zeros((num_layers, num_layers))
+        if weight_backend == 'dense':
+            self.weights = np.zeros((num_layers, num_layers))
+        else:
+            self.weights = SparseWeights((num_layers, num_layers))
 
         # Inicializar los pesos según las reglas
         self._initialize_weights()
@@ -29,8 +128,11 @@ class ConnectionManager:
 
     def _initialize_weights(self):
         """
-        Puebla la matriz de pesos inicial a partir de la lista de reglas.
+        Puebla la matriz de pesos inicial a partir de la lista de reglas y guarda
+        los índices (destino, fuente) de las entradas definidas para los accesos en bloque.
         """
+        # (destino, fuente) -> peso; si dos reglas definen la misma entrada, prevalece la última
+        rule_entries = {}
         for rule in self.coupling_rules:
             target_idx = self.layer_map.get((rule['target_col'], rule['target_layer']))
             if target_idx is None: continue
@@ -43,7 +145,11 @@ class ConnectionManager:
                 if source_idx is None: continue
 
                 # Asignar el peso inicial
-                self.weights[target_idx, source_idx] = rule.get('weight', 1.0)
+                rule_entries[(target_idx, source_idx)] = rule.get('weight', 1.0)
+
+        entries = np.array(list(rule_entries), dtype=np.int64).reshape(-1, 2)
+        self.rule_targets, self.rule_sources = entries[:, 0], entries[:, 1]
+        self.set_weights(np.fromiter(rule_entries.values(), dtype=float, count=len(rule_entries)))
 
     def get_weight(self, source_col, source_layer, target_col, target_layer):
         """Obtiene un peso específico de la matriz."""
@@ -57,6 +163,106 @@ class ConnectionManager:
         target_idx = self.layer_map[(target_col, target_layer)]
         self.weights[target_idx, source_idx] = new_weight
 
+    def get_weights(self, target_idx: np.ndarray = None, source_idx: np.ndarray = None) -> np.ndarray:
+        """
+        Obtiene en bloque los pesos de las entradas (target_idx[k], source_idx[k]),
+        con índices de layer_map. Por defecto, las de todas las reglas
+        (rule_targets, rule_sources).
+        """
+        if target_idx is None:
+            target_idx, source_idx = self.rule_targets, self.rule_sources
+        if self.weight_backend == 'dense':
+            return self.weights[target_idx, source_idx]
+        return self.weights.get(target_idx, source_idx)
+
+    def set_weights(self, values: np.ndarray, target_idx: np.ndarray = None, source_idx: np.ndarray = None):
+        """Actualiza en bloque los pesos de las entradas indicadas (por defecto, las de las reglas)."""
+        if target_idx is None:
+            target_idx, source_idx = self.rule_targets, self.rule_sources
+        if self.weight_backend == 'dense':
+            self.weights[target_idx, source_idx] = values
+        else:
+            self.weights.set(target_idx, source_idx, values)
+
+    def weight_matrix(self):
+        """Devuelve los pesos como scipy.sparse.csr_array, con cualquiera de los backends."""
+        if self.weight_backend == 'dense':
+            from scipy import sparse
+            return sparse.csr_array(self.weights)
+        return self.weights.tocsr()
+
     def record_weights(self):
         """Guarda una copia de la matriz de pesos actual en el historial."""
         self.weight_history.append(self.weights.copy())
+
+
+class Projection:
+    """
+    Proyección sináptica neurona a neurona entre dos capas, con una matriz de pesos
+    dispersa (n_target, n_source). Los pesos positivos son excitatorios y los
+    negativos inhibitorios.
+
+    Los pesos se guardan una sola vez, como matriz CSR [W+; W-] de forma
+    (2 * n_target, n_source) con las magnitudes de cada signo, así que cada paso
+    propaga la actividad de la capa fuente con un solo producto matriz-vector
+    disperso y separa el resultado en corrientes exc/inh.
+    """
+    def __init__(self, source: tuple, target: tuple, weights):
+        """
+        Args:
+            source (tuple): (columna, capa) de origen.
+            target (tuple): (columna, capa) de destino.
+            weights: Matriz (n_target, n_source), densa o de scipy.sparse.
+        """
+        self.source = tuple(source)
+        self.target = tuple(target)
+        self.weights = weights
+
+    @property
+    def weights(self):
+        """
+        Matriz de pesos con signo (scipy.sparse.csr_array), reconstruida en cada acceso.
+        Para modificar los pesos hay que asignarla de nuevo (projection.weights = ...):
+        cambiar la matriz devuelta no afecta a la proyección.
+        """
+        return self._stacked[:self.n_target] - self._stacked[self.n_target:]
+
+    @weights.setter
+    def weights(self, weights):
+        from scipy import sparse
+
+        weights = sparse.csr_array(weights, dtype=float)
+        self.n_target, self.n_source = weights.shape
+        self._stacked = sparse.vstack([weights.maximum(0), -weights.minimum(0)], format='csr')
+        self._stacked.eliminate_zeros()
+
+    @classmethod
+    def random(cls, source: tuple, target: tuple, n_source: int, n_target: int, p: float,
+               weight: float, seed=None) -> 'Projection':
+        """
+        Crea una proyección con conexiones aleatorias de probabilidad p, todas con el mismo peso.
+        El coste es proporcional al número de sinapsis, no a n_source * n_target.
+        """
+        from scipy import sparse
+
+        rng = np.random.default_rng(seed)
+        n_pairs = n_target * n_source
+        synapses = rng.choice(n_pairs, size=rng.binomial(n_pairs, p), replace=False)
+        rows, cols = np.divmod(synapses, n_source)
+        weights = sparse.csr_array((np.full(len(synapses), float(weight)), (rows, cols)), shape=(n_target, n_source))
+        return cls(source, target, weights)
+
+    @property
+    def n_synapses(self) -> int:
+        return self._stacked.nnz
+
+    def propagate(self, source_activity: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Propaga la actividad (spikes o tasas) de la capa fuente.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Entradas excitatorias e inhibitorias (ambas >= 0)
+                                           de cada neurona de la capa destino.
+        """
+        currents = self._stacked @ np.asarray(source_activity, dtype=float)
+        return currents[:self.n_target], currents[self.n_target:]
@@ -1,28 +1,106 @@
-# cbn_neuroscience/factory.py
+# cbn_neuroscience/core/factory.py
 
+import os
+import random
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 from cbnetwork.cbnetwork import CBN
 from cbnetwork.globaltopology import GlobalTopology
 from cbnetwork.coupling import OrCoupling
 from cbnetwork.internalvariable import InternalVariable
 from cbnetwork.directededge import DirectedEdge
 from .laminar_template import LaminarColumnTemplate
+from .shared_dynamics import SharedDynamics, resolve_input_signals
+
+# Claves de los flujos aleatorios derivados de la semilla de generación
+_TOPOLOGY_STREAM, _NETWORK_STREAM = 0, 1
+
+def _stream(seed: int, *key: int) -> np.random.SeedSequence:
+    """Flujo independiente para una parte de la CBN, que no depende del orden de generación."""
+    return np.random.SeedSequence(seed, spawn_key=key)
+
+def _sample_topology(v_topology: int, n_nodes: int, rng: np.random.Generator) -> list:
+    """
+    Muestrea los pares (red de salida, red de entrada) de la topología global con
+    el generador dado, con los códigos de GlobalTopology: 1 grafo completo,
+    2 dígrafo aleatorio (cada par con probabilidad 1/2), 3 ciclo y 4 camino.
+    """
+    nodes = np.arange(1, n_nodes + 1)
+    if v_topology == 1:
+        mask = ~np.eye(n_nodes, dtype=bool)
+    elif v_topology == 2:
+        mask = (rng.random((n_nodes, n_nodes)) < 0.5) & ~np.eye(n_nodes, dtype=bool)
+    elif v_topology in (3, 4):
+        mask = np.zeros((n_nodes, n_nodes), dtype=bool)
+        mask[np.arange(n_nodes - 1), np.arange(1, n_nodes)] = True
+        if v_topology == 3 and n_nodes > 1:
+            mask[n_nodes - 1, 0] = True
+    else:
+        raise ValueError(f"La generación con semilla no admite v_topology={v_topology}.")
+    outputs, inputs = np.nonzero(mask)
+    return list(zip(nodes[outputs].tolist(), nodes[inputs].tolist()))
+
+def _sample_network_dynamics(task: tuple) -> list:
+    """Muestrea las CNF propias de un bloque de redes, cada una con su flujo. Se ejecuta en el pool."""
+    template, seed, network_indices = task
+    return [
+        list(template.sample_cnf_functions(np.random.default_rng(_stream(seed, _NETWORK_STREAM, i))).values())
+        for i in network_indices
+    ]
 
 def generate_laminar_cbn(
     template: LaminarColumnTemplate,
     n_local_networks: int,
     v_topology: int = 1,
-    coupling_strategy=None
+    coupling_strategy=None,
+    shared_dynamics: bool = False,
+    seed: int = None,
+    heterogeneous_dynamics: bool = False,
+    n_workers: int = 1
 ) -> CBN:
     """
     Crea una Red Booleana Acoplada (CBN) utilizando una plantilla laminar.
+
+    Con shared_dynamics=True las redes locales no reciben objetos InternalVariable:
+    todas comparten un único SharedDynamics con las CNF de la plantilla (atributo
+    shared_dynamics de cada red), que Simulator y CBNSimulator compilan directamente.
+
+    Con seed, la topología y cada red local usan un flujo aleatorio propio derivado
+    de (seed, parte, índice), de modo que la CBN es idéntica bit a bit para una
+    semilla dada, con independencia del orden o del reparto entre procesos. La
+    topología se muestrea entonces en este módulo (_sample_topology, sin
+    o_global_topology) y no con GlobalTopology, así que el módulo random no se usa
+    ni se modifica; la estrategia de acoplamiento debe ser determinista, como
+    OrCoupling. La dinámica de la plantilla
+    (copiada o compartida por las redes sin heterogeneous_dynamics) no depende de
+    seed: la fija la semilla de LaminarColumnTemplate.
+
+    Args:
+        seed (int, optional): Semilla de la generación. Por defecto, se usa el módulo random.
+        heterogeneous_dynamics (bool): Si es True, cada red muestrea sus propias CNF con la
+                                       estructura de la plantilla en lugar de copiar las suyas.
+        n_workers (int): Procesos para muestrear las dinámicas heterogéneas; con None,
+                         os.cpu_count().
     """
     if coupling_strategy is None:
         coupling_strategy = OrCoupling()
+    if heterogeneous_dynamics and shared_dynamics:
+        raise ValueError("heterogeneous_dynamics y shared_dynamics son incompatibles.")
+    if heterogeneous_dynamics and seed is None:
+        seed = random.getrandbits(64)
 
     # 1. Generar la topología global
-    o_global_topology = GlobalTopology.generate_sample_topology(
-        v_topology=v_topology, n_nodes=n_local_networks
-    )
+    if seed is None:
+        o_global_topology = GlobalTopology.generate_sample_topology(
+            v_topology=v_topology, n_nodes=n_local_networks
+        )
+        l_relations = o_global_topology.l_edges
+    else:
+        o_global_topology = None
+        l_relations = _sample_topology(v_topology, n_local_networks,
+                                       np.random.default_rng(_stream(seed, _TOPOLOGY_STREAM)))
 
     # 2. Generar las redes locales
     l_local_networks = []
@@ -41,18 +119,18 @@ def generate_laminar_cbn(
     i_directed_edge = 1
     # Crear un mapa de índice a red para una búsqueda rápida
     network_map = {net.index: net for net in l_local_networks}
+    # Posiciones de las variables de salida de la plantilla, comunes a todas las redes
+    output_indices_in_template = set(template.l_output_var_indexes)
+    output_positions = [i for i in range(template.n_vars_network) if (i + 1) in output_indices_in_template]
+    # Ejes agrupados por red de entrada en una sola pasada, en orden de creación
+    d_input_signals = defaultdict(list)
 
-    for relation in o_global_topology.l_edges:
+    for relation in l_relations:
         output_ln_idx, input_ln_idx = relation
 
-        # Lógica correcta para obtener las variables de salida
+        # Mapear las posiciones de salida de la plantilla a las variables reales de la red de salida
         output_network = network_map[output_ln_idx]
-        output_indices_in_template = template.l_output_var_indexes
-        # Mapear los índices de la plantilla a los índices reales de la red de salida
-        output_variables = [
-            var for i, var in enumerate(output_network.internal_variables)
-            if (i + 1) in output_indices_in_template
-        ]
+        output_variables = [output_network.internal_variables[i] for i in output_positions]
 
         coupling_function = coupling_strategy.generate_coupling_function(output_variables)
 
@@ -65,23 +143,36 @@ def generate_laminar_cbn(
             coupling_function=coupling_function
         )
         l_directed_edges.append(o_directed_edge)
+        d_input_signals[input_ln_idx].append(o_directed_edge)
         i_last_variable += 1
         i_directed_edge += 1
 
     # 4. Procesar las señales de entrada para cada red
     for o_local_network in l_local_networks:
-        input_signals = [edge for edge in l_directed_edges if edge.input_local_network == o_local_network.index]
-        o_local_network.process_input_signals(input_signals=input_signals)
+        o_local_network.process_input_signals(input_signals=d_input_signals.get(o_local_network.index, []))
 
-    # 5. Generar la dinámica local
-    for o_local_network in l_local_networks:
-        for i_local_variable in o_local_network.internal_variables:
-            template_var_index = (i_local_variable - 1) % template.n_vars_network + 1
-            cnf_function = template.d_variable_cnf_function.get(template_var_index, [])
-            o_internal_variable = InternalVariable(
-                index=i_local_variable, cnf_function=cnf_function
+    # 5. Generar la dinámica local: la CNF de cada posición se toma una sola vez de la plantilla.
+    # Las señales de entrada de la plantilla se resuelven a las de los ejes de cada red.
+    template_cnf_functions = [
+        template.d_variable_cnf_function.get(position, [])
+        for position in range(1, template.n_vars_network + 1)
+    ]
+    input_signals = template.l_input_coupling_signal_indexes
+    if shared_dynamics:
+        o_shared_dynamics = SharedDynamics(template_cnf_functions, input_signals)
+        for o_local_network in l_local_networks:
+            o_local_network.shared_dynamics = o_shared_dynamics
+    else:
+        if heterogeneous_dynamics:
+            l_network_cnf_functions = _generate_network_dynamics(template, seed, l_local_networks, n_workers)
+        else:
+            l_network_cnf_functions = [template_cnf_functions] * len(l_local_networks)
+        for o_local_network, cnf_functions in zip(l_local_networks, l_network_cnf_functions):
+            cnf_functions = resolve_input_signals(cnf_functions, input_signals, o_local_network.external_variables)
+            o_local_network.descriptive_function_variables.extend(
+                InternalVariable(index=i_local_variable, cnf_function=cnf_function)
+                for i_local_variable, cnf_function in zip(o_local_network.internal_variables, cnf_functions)
             )
-            o_local_network.descriptive_function_variables.append(o_internal_variable)
 
     # 6. Crear la instancia final de CBN
     o_cbn = CBN(
@@ -90,3 +181,19 @@ def generate_laminar_cbn(
     o_cbn.o_global_topology = o_global_topology
 
     return o_cbn
+
+
+def _generate_network_dynamics(template: LaminarColumnTemplate, seed: int, l_local_networks: list,
+                               n_workers: int) -> list:
+    """Muestrea las CNF de cada red, repartiendo bloques de redes en un pool de procesos."""
+    network_indices = [net.index for net in l_local_networks]
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    if n_workers == 1 or len(network_indices) <= 1:
+        return _sample_network_dynamics((template, seed, network_indices))
+
+    chunk = max(1, len(network_indices) // (4 * n_workers))
+    tasks = [(template, seed, network_indices[i:i + chunk]) for i in range(0, len(network_indices), chunk)]
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        # map conserva el orden de los bloques
+        return [cnf_functions for block in executor.map(_sample_network_dynamics, tasks) for cnf_functions in block]
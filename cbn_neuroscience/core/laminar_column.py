@@ -1,5 +1,7 @@
 # cbn_neuroscience/core/laminar_column.py
 
+from collections import deque
+
 import numpy as np
 from cbnetwork.localnetwork import LocalNetwork
 
@@ -8,7 +10,8 @@ class LaminarColumn(LocalNetwork):
     Representación de una columna cortical con estructura de 6 capas
     basada en Trappenberg Sección 1.2.7.
     """
-    def __init__(self, index: int, internal_variables: list, layer_map: dict = None, **kwargs):
+    def __init__(self, index: int, internal_variables: list, layer_map: dict = None,
+                 max_history: int = None, **kwargs):
         # El constructor base espera 'index' e 'internal_variables'
         super().__init__(index, internal_variables)
 
@@ -16,7 +19,8 @@ class LaminarColumn(LocalNetwork):
         self.layer_map = layer_map or self._default_layer_map(len(internal_variables))
 
         # Nivel 3 de Marr: Implementación (Vector de Sparse Coding)
-        self.activity_history = []
+        # Con max_history se conservan solo los últimos estados
+        self.activity_history = [] if max_history is None else deque(maxlen=max_history)
         self.current_state = np.zeros(len(internal_variables))
 
     def _default_layer_map(self, n: int) -> dict:
@@ -37,6 +41,9 @@ class LaminarColumn(LocalNetwork):
     def update_with_uncertainty(self, next_state: np.ndarray, p_error: float = 0.01) -> np.ndarray:
         """
         Implementa la Sección 1.5.3: El cerebro incierto (Stochastic Transitions)
+
+        Para barridos de muchas trayectorias ruidosas, véase uncertainty.uncertainty_sweep,
+        que aplica el mismo ruido dentro del kernel compilado.
         """
         # Introducimos ruido estocástico (Epistemological Uncertainty)
         noise_mask = np.random.random(next_state.shape) < p_error
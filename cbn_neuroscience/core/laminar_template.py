@@ -1,33 +1,89 @@
-# cbn_neuroscience/laminar.py
+# cbn_neuroscience/core/laminar_template.py
 
 import random
+
+import numpy as np
 from cbnetwork.localtemplates import LocalNetworkTemplate
-from cbnetwork.localnetwork import LocalNetwork
-from cbnetwork.cnflist import CNFList
 
 from .laminar_column import LaminarColumn
 
+def _sample_cnf_functions(rng: np.random.Generator, variables: np.ndarray, p: np.ndarray, n_functions: int,
+                          max_clauses: int, max_literals: int) -> list:
+    """
+    Genera n_functions funciones CNF aleatorias en bloque: de 1 a max_clauses
+    cláusulas de 1 a max_literals literales, cuyas variables se eligen con
+    probabilidades p sin repetir variable dentro de una cláusula (las repetidas
+    se vuelven a sortear) y se niegan con probabilidad 1/2.
+    """
+    max_literals = min(max_literals, int(np.count_nonzero(p)))
+    n_clauses = rng.integers(1, max_clauses + 1, size=n_functions)
+    n_literals = rng.integers(1, max_literals + 1, size=int(n_clauses.sum()))
+    clause_ids = np.repeat(np.arange(len(n_literals)), n_literals)
+    chosen = rng.choice(variables, size=len(clause_ids), p=p)
+    while True:
+        # Ordenadas por (cláusula, variable), las repeticiones quedan contiguas
+        order = np.lexsort((chosen, clause_ids))
+        repeated = ((clause_ids[order[1:]] == clause_ids[order[:-1]]) &
+                    (chosen[order[1:]] == chosen[order[:-1]]))
+        if not repeated.any():
+            break
+        redraw = order[1:][repeated]
+        chosen[redraw] = rng.choice(variables, size=len(redraw), p=p)
+    literals = np.where(rng.random(len(chosen)) < 0.5, -chosen, chosen).tolist()
+
+    cnf_functions = []
+    clause_ends = np.cumsum(n_literals).tolist()
+    clause = start = 0
+    for count in n_clauses.tolist():
+        cnf_function = []
+        for end in clause_ends[clause:clause + count]:
+            cnf_function.append(literals[start:end])
+            start = end
+        clause += count
+        cnf_functions.append(cnf_function)
+    return cnf_functions
+
 class LaminarColumnTemplate(LocalNetworkTemplate):
     """
     Una plantilla para crear redes locales con una estructura laminar predefinida,
     con conectividad de alta densidad en las capas asociativas.
     """
-    def __init__(self, layer_sizes: dict, connectivity_bias: float = 2.0, **kwargs):
+    def __init__(self, layer_sizes: dict, connectivity_bias: float = 2.0, seed: int = None,
+                 max_history: int = None, **kwargs):
+        """
+        Args:
+            layer_sizes (dict): Tamaño de cada capa ('L2/3', 'L4', 'L5/6').
+            connectivity_bias (float): Peso de las conexiones entre variables de las capas II/III.
+            seed (int, optional): Semilla de la dinámica de la plantilla. Por defecto, se toma
+                                  del módulo random (reproducible con random.seed).
+            max_history (int, optional): Límite de activity_history de las columnas creadas
+                                         (véase LaminarColumn). Por defecto, sin límite.
+        """
         self.layer_sizes = layer_sizes
         self.connectivity_bias = connectivity_bias
+        self.seed = seed
+        self.max_history = max_history
         n_vars_network = sum(layer_sizes.values())
         super().__init__(n_vars_network=n_vars_network, **kwargs)
 
-    def generate_local_dynamic(self):
+    def generate_local_dynamic(self, rng: np.random.Generator = None):
         """
         Genera la dinámica local para una red laminar, con validación y
         conectividad de alta densidad para las capas II/III.
+
+        Args:
+            rng (np.random.Generator, optional): Generador a usar. Por defecto, uno
+                                                 derivado de la semilla de la plantilla.
         """
         if self.n_input_variables > self.layer_sizes.get('L4', 0):
             raise ValueError("El número de variables de entrada no puede exceder el tamaño de la Capa L4.")
         if self.n_output_variables > self.layer_sizes.get('L5/6', 0):
             raise ValueError("El número de variables de salida no puede exceder el tamaño de la Capa L5/6.")
 
+        if rng is None:
+            # Sin semilla, el generador se siembra desde random para que random.seed siga controlando la plantilla
+            rng = np.random.default_rng(self.seed if self.seed is not None else random.getrandbits(64))
+
         start_index = 1
         l_internal_var_indexes = list(range(start_index, self.n_vars_network + start_index))
         self.layers = {}
@@ -36,33 +92,44 @@ class LaminarColumnTemplate(LocalNetworkTemplate):
             self.layers[layer] = l_internal_var_indexes[current_pos : current_pos + size]
             current_pos += size
 
+        # Índices provisionales de las señales de entrada: la j-ésima se sustituye en cada
+        # red por la señal del j-ésimo eje que recibe
         input_signal_start_index = self.n_vars_network + 1
-        l_input_coupling_signal_indexes = list(range(input_signal_start_index, input_signal_start_index + self.n_input_variables))
-        nodes_for_input = random.sample(self.layers['L4'], self.n_input_variables)
-        self.l_output_var_indexes = random.sample(self.layers['L5/6'], self.n_output_variables)
-
-        self.d_variable_cnf_function = {}
-        associative_layers = self.layers.get('L2/3', [])
-
-        for i_variable in l_internal_var_indexes:
-            input_coup_sig_index = None
-            if i_variable in nodes_for_input:
-                input_coup_sig_index = random.choice(l_input_coupling_signal_indexes)
-                l_input_coupling_signal_indexes.remove(input_coup_sig_index)
-
-            if i_variable in associative_layers:
-                preferred_pool = associative_layers * int(self.connectivity_bias)
-                other_pool = [n for n in l_internal_var_indexes if n not in associative_layers]
-                biased_vars_pool = preferred_pool + other_pool
-            else:
-                biased_vars_pool = l_internal_var_indexes
-
-            self.d_variable_cnf_function[i_variable] = CNFList.generate_cnf(
-                l_inter_vars=biased_vars_pool,
-                input_coup_sig_index=input_coup_sig_index,
-                max_clauses=self.n_max_of_clauses,
-                max_literals=self.n_max_of_literals,
+        self.l_input_coupling_signal_indexes = list(range(input_signal_start_index, input_signal_start_index + self.n_input_variables))
+        nodes_for_input = rng.choice(self.layers['L4'], self.n_input_variables, replace=False).tolist()
+        self.l_output_var_indexes = rng.choice(self.layers['L5/6'], self.n_output_variables, replace=False).tolist()
+        # Nodo de L4 -> señal de acoplamiento que recibe
+        self.d_input_signal_nodes = dict(zip(nodes_for_input, rng.permutation(self.l_input_coupling_signal_indexes).tolist()))
+
+        self.d_variable_cnf_function = self.sample_cnf_functions(rng)
+
+    def sample_cnf_functions(self, rng: np.random.Generator) -> dict:
+        """
+        Muestrea un juego de funciones CNF con la estructura de capas, las entradas
+        y el sesgo de conectividad de la plantilla.
+
+        Returns:
+            dict: {posición de la variable: función CNF}, en orden de posición.
+        """
+        # Pesos de muestreo: las variables de las capas II/III eligen otras variables
+        # asociativas con peso int(connectivity_bias) y el resto con peso 1;
+        # las demás variables eligen de forma uniforme entre todas.
+        variables = np.arange(1, self.n_vars_network + 1)
+        is_associative = np.isin(variables, self.layers.get('L2/3', []))
+        biased_weights = np.where(is_associative, int(self.connectivity_bias), 1).astype(float)
+        uniform_weights = np.ones(len(variables))
+
+        d_variable_cnf_function = {}
+        for group, weights in ((is_associative, biased_weights), (~is_associative, uniform_weights)):
+            cnf_functions = _sample_cnf_functions(
+                rng, variables, weights / weights.sum(), int(np.count_nonzero(group)),
+                self.n_max_of_clauses, self.n_max_of_literals
             )
+            for i_variable, cnf_function in zip(variables[group].tolist(), cnf_functions):
+                if i_variable in self.d_input_signal_nodes:
+                    cnf_function[rng.integers(len(cnf_function))].append(self.d_input_signal_nodes[i_variable])
+                d_variable_cnf_function[i_variable] = cnf_function
+        return dict(sorted(d_variable_cnf_function.items()))
 
     def create_network(self, index: int, internal_variables: list) -> LaminarColumn:
         """
@@ -79,5 +146,6 @@ class LaminarColumnTemplate(LocalNetworkTemplate):
         return LaminarColumn(
             index=index,
             internal_variables=internal_variables,
-            layer_map=self.layers
+            layer_map=self.layers,
+            max_history=self.max_history
         )
@@ -1,13 +1,36 @@
 # cbn_neuroscience/core/network_simulator.py
 
+from collections import defaultdict
+
 import numpy as np
-from cbn_neuroscience.core.connections import ConnectionManager
+from cbn_neuroscience.core.connections import ConnectionManager, Projection
 from cbn_neuroscience.core.plasticity_manager import PlasticityManager
 
 class NetworkSimulator:
-    def __init__(self, columns, coupling_rules, plasticity_manager: PlasticityManager = None):
+    def __init__(self, columns, coupling_rules, plasticity_manager: PlasticityManager = None,
+                 weight_backend: str = 'dense', projections: list[Projection] = None):
+        """
+        Args:
+            columns: Las columnas de la red.
+            coupling_rules: Reglas de acoplamiento entre capas (un peso escalar por par de capas,
+                            aplicado a la actividad media de la capa fuente).
+            plasticity_manager (PlasticityManager, optional): Regla de plasticidad sobre los pesos de las reglas.
+            weight_backend (str): Backend de pesos de ConnectionManager ('dense' o 'sparse').
+            projections (list[Projection], optional): Proyecciones neurona a neurona, propagadas
+                                                      además de las reglas.
+        """
         self.columns = columns
-        self.connection_manager = ConnectionManager(columns, coupling_rules)
+        self.connection_manager = ConnectionManager(columns, coupling_rules, weight_backend=weight_backend)
+        self.projections = projections or []
+        self.projections_by_target = defaultdict(list)
+        for projection in self.projections:
+            (source_col, source_layer), (target_col, target_layer) = projection.source, projection.target
+            expected_shape = (columns[target_col].layers[target_layer].n_nodes,
+                              columns[source_col].layers[source_layer].n_nodes)
+            if (projection.n_target, projection.n_source) != expected_shape:
+                raise ValueError(f"La proyección {projection.source} -> {projection.target} debe tener forma "
+                                 f"{expected_shape}, no {(projection.n_target, projection.n_source)}.")
+            self.projections_by_target[target_col].append(projection)
         self.dt = columns[0].layers[list(columns[0].layers.keys())[0]].dt if columns else 0.1
         self.plasticity_manager = plasticity_manager
 
@@ -65,6 +88,17 @@ class NetworkSimulator:
                         layer_inputs[target_layer_name].setdefault('I_total', 0)
                         layer_inputs[target_layer_name]['I_total'] += weight * product_of_sources
 
+            # Propagar las proyecciones neurona a neurona
+            for projection in self.projections_by_target[i]:
+                source_col, source_layer = projection.source
+                exc, inh = projection.propagate(prev_spikes_state[f'col_{source_col}'][source_layer])
+                target_inputs = layer_inputs[projection.target[1]]
+                if col.is_spike_based:
+                    target_inputs['exc_spikes'] += exc
+                    target_inputs['inh_spikes'] += inh
+                else: # Rate-based
+                    target_inputs['I_total'] = target_inputs.get('I_total', 0) + (exc - inh)
+
             # Añadir inputs externos y actualizar la columna
             col_ext_inputs = ext_inputs.get(i, {})
             for layer_name, inputs in col_ext_inputs.items():
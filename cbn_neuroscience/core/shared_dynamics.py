@@ -0,0 +1,88 @@
+# cbn_neuroscience/core/shared_dynamics.py
+
+from cbnetwork.internalvariable import InternalVariable
+from cbn_neuroscience.core.compiled_rules import CompiledRules, compile_cnf_rules
+
+def resolve_input_signals(cnf_functions: list, input_signals: list, external_variables: list) -> list:
+    """
+    Sustituye en unas CNF de plantilla la j-ésima señal de entrada provisional por la
+    j-ésima variable externa de la red (en orden creciente, el de creación de los ejes).
+    Los literales de las señales sin eje se eliminan: una entrada no conectada es falsa.
+    """
+    d_signal = dict(zip(input_signals, sorted(external_variables)))
+    unconnected = set(input_signals) - set(d_signal)
+    return [
+        [[d_signal.get(abs(literal), abs(literal)) * (1 if literal > 0 else -1)
+          for literal in clause if abs(literal) not in unconnected]
+         for clause in cnf_function]
+        for cnf_function in cnf_functions
+    ]
+
+
+class SharedDynamics:
+    """
+    Funciones CNF de una plantilla guardadas una sola vez y compartidas por todas
+    las redes locales generadas con ella (flyweight).
+
+    Las redes que la usan tienen el atributo shared_dynamics y no materializan
+    objetos InternalVariable: Simulator y compile_cbn compilan directamente estas
+    funciones, con la misma semántica posicional de los literales internos. Las
+    reglas compiladas se reutilizan entre redes con la misma disposición de
+    variables externas, así que la memoria crece con el número de plantillas y
+    no con el de redes.
+    """
+    def __init__(self, cnf_functions: list, input_signals: list = None):
+        """
+        Args:
+            cnf_functions (list): Funciones CNF de la plantilla, en orden de posición.
+            input_signals (list, optional): Índices provisionales de las señales de entrada
+                                            de la plantilla. La j-ésima se lee de la j-ésima
+                                            variable externa de cada red; las que no tienen
+                                            eje se eliminan de las cláusulas.
+        """
+        self.cnf_functions = cnf_functions
+        self.input_signals = input_signals
+        self.n_vars = len(cnf_functions)
+        self._literal_variables = {abs(literal) for cnf in cnf_functions for clause in cnf for literal in clause}
+        self._rules_cache = {}
+
+    def compile(self, external_variables: list, max_lut_fan_in: int = 10) -> CompiledRules:
+        """
+        Devuelve las reglas compiladas para una red con estas variables externas.
+        Los arreglos son compartidos por todas las redes cuyas externas ocupan las
+        mismas ranuras; solo external_keys es propio de cada red.
+        """
+        external_keys = sorted(external_variables)
+        if self.input_signals is not None:
+            return self._compile_input_signals(external_keys, max_lut_fan_in)
+        # Solo importan las externas que aparecen en algún literal y su posición
+        referenced = tuple((pos, var) for pos, var in enumerate(external_keys) if var in self._literal_variables)
+        key = (len(external_keys), referenced, max_lut_fan_in)
+        if key not in self._rules_cache:
+            self._rules_cache[key] = compile_cnf_rules(self.cnf_functions, external_keys,
+                                                       max_lut_fan_in=max_lut_fan_in)
+        rules = self._rules_cache[key]
+        return CompiledRules(rules.var_ptr, rules.clause_ptr, rules.lit_slot, rules.lit_negated,
+                             rules.n_internal, external_keys,
+                             rules.lut_ptr, rules.lut_inputs, rules.lut_offset, rules.lut_table)
+
+    def _compile_input_signals(self, external_keys: list, max_lut_fan_in: int) -> CompiledRules:
+        """Compila las CNF con las señales de la plantilla en las ranuras de las externas de la red."""
+        n_connected = min(len(self.input_signals), len(external_keys))
+        key = (n_connected, max_lut_fan_in)
+        if key not in self._rules_cache:
+            unconnected = {signal: 0 for signal in self.input_signals[n_connected:]}
+            self._rules_cache[key] = compile_cnf_rules(self.cnf_functions, self.input_signals[:n_connected],
+                                                       constants=unconnected, max_lut_fan_in=max_lut_fan_in)
+        rules = self._rules_cache[key]
+        return CompiledRules(rules.var_ptr, rules.clause_ptr, rules.lit_slot, rules.lit_negated,
+                             rules.n_internal, external_keys[:n_connected],
+                             rules.lut_ptr, rules.lut_inputs, rules.lut_offset, rules.lut_table)
+
+    def materialize(self, internal_variables: list, external_variables: list = None) -> list:
+        """Crea los InternalVariable de una red, para el código que los necesita explícitamente."""
+        cnf_functions = self.cnf_functions
+        if self.input_signals is not None:
+            cnf_functions = resolve_input_signals(cnf_functions, self.input_signals, external_variables or [])
+        return [InternalVariable(index=var_index, cnf_function=cnf_function)
+                for var_index, cnf_function in zip(internal_variables, cnf_functions)]
@@ -1,115 +1,357 @@
 # cbn_neuroscience/core/simulation.py
 
+from collections import OrderedDict
+
 import numpy as np
-import numba
 from cbnetwork.localnetwork import LocalNetwork
+from cbn_neuroscience.core.compiled_rules import CompiledRules, compile_cnf_rules, splice_rules
+
+def load_kernels():
+    """
+    Importa bajo demanda el módulo de kernels compilados (boolean_kernels), de modo
+    que numba solo se carga cuando se simula por primera vez una red booleana.
+    """
+    from cbn_neuroscience.core import boolean_kernels
+    return boolean_kernels
+
+def warmup():
+    """
+    Compila (o carga de la caché de disco) los kernels de simulación para las
+    firmas habituales, para que la primera simulación no pague la compilación.
+    """
+    load_kernels().warmup()
+
+def pack_states(states: np.ndarray) -> np.ndarray:
+    """
+    Empaqueta un lote de estados booleanos (batch, n_vars) en palabras uint64
+    de forma (n_vars, ceil(batch / 64)), una trayectoria por bit.
+    """
+    states = np.asarray(states)
+    batch, num_vars = states.shape
+    num_words = (batch + 63) // 64
+    padded = np.zeros((num_words * 64, num_vars), dtype=np.uint64)
+    padded[:batch] = states != 0
+    shifts = np.arange(64, dtype=np.uint64)[None, :, None]
+    words = np.bitwise_or.reduce(padded.reshape(num_words, 64, num_vars) << shifts, axis=1)
+    return np.ascontiguousarray(words.T)
+
+def unpack_states(packed: np.ndarray, batch: int) -> np.ndarray:
+    """Operación inversa de pack_states: devuelve un arreglo (batch, n_vars)."""
+    num_vars, num_words = packed.shape
+    shifts = np.arange(64, dtype=np.uint64)
+    bits = (packed[:, :, None] >> shifts) & np.uint64(1)
+    return bits.reshape(num_vars, num_words * 64)[:, :batch].T.astype(int)
+
+_HISTORY_CHUNK = 4096
 
-@numba.njit
-def _find_external_pos(external_map: np.ndarray, var_index: int) -> int:
-    for i in range(len(external_map)):
-        if external_map[i] == var_index:
-            return i
-    return -1
-
-@numba.njit
-def _evaluate_clause(clause: np.ndarray, state: np.ndarray, external: np.ndarray, external_map: np.ndarray) -> bool:
-    for literal in clause:
-        is_negated = literal < 0
-        var_index = abs(literal)
-
-        if var_index < len(state) + 1:
-            val = state[var_index - 1]
+class _HistoryRecorder:
+    """Registra bloques consecutivos de estados según un modo de historia con memoria acotada."""
+    MODES = ('full', 'none', 'last_k', 'every_k', 'bitpacked', 'memmap')
+
+    def __init__(self, mode: str, steps: int, num_vars: int, k: int = 1, path: str = None):
+        if mode not in self.MODES:
+            raise ValueError(f"Modo de historia desconocido: '{mode}'. Opciones: {self.MODES}.")
+        if mode in ('last_k', 'every_k') and k < 1:
+            raise ValueError("k debe ser al menos 1.")
+        if mode == 'memmap' and path is None:
+            raise ValueError("El modo 'memmap' requiere una ruta de archivo (path).")
+
+        self.mode = mode
+        self.k = k
+        self.count = 0
+        if mode == 'full':
+            self.buffer = np.zeros((steps + 1, num_vars), dtype=int)
+        elif mode == 'none':
+            self.buffer = np.zeros((1, num_vars), dtype=int)
+        elif mode == 'last_k':
+            self.buffer = np.zeros((min(k, steps + 1), num_vars), dtype=int)
+        elif mode == 'every_k':
+            self.buffer = np.zeros((steps // k + 1, num_vars), dtype=int)
+        elif mode == 'bitpacked':
+            self.buffer = np.zeros((steps + 1, (num_vars + 7) // 8), dtype=np.uint8)
+        else:
+            self.buffer = np.lib.format.open_memmap(path, mode='w+', dtype=np.uint8, shape=(steps + 1, num_vars))
+
+    def record_block(self, start: int, rows: np.ndarray):
+        """Registra los estados de los pasos start, start + 1, ..., start + len(rows) - 1."""
+        end = start + len(rows)
+        self.count = end
+        if self.mode in ('full', 'memmap'):
+            self.buffer[start:end] = rows
+        elif self.mode == 'bitpacked':
+            self.buffer[start:end] = np.packbits(rows.astype(bool), axis=1)
+        elif self.mode == 'none':
+            self.buffer[0] = rows[-1]
+        elif self.mode == 'last_k':
+            size = len(self.buffer)
+            rows = rows[-size:]
+            self.buffer[np.arange(end - len(rows), end) % size] = rows
         else:
-            ext_pos = _find_external_pos(external_map, var_index)
-            val = external[ext_pos] if ext_pos != -1 else 0
-
-        if is_negated:
-            val = 1 - val
-
-        if val == 1:
-            return True
-    return False
-
-@numba.njit
-def _accelerated_next_state(
-    current_state: np.ndarray,
-    rules: numba.typed.List,
-    external_values_arr: np.ndarray,
-    external_map: np.ndarray
-) -> np.ndarray:
-    next_state = np.zeros_like(current_state)
-    num_vars = len(current_state)
-
-    for i in range(num_vars):
-        var_rules = rules[i]
-        func_result = True
-        for clause in var_rules:
-            if not _evaluate_clause(clause, current_state, external_values_arr, external_map):
-                func_result = False
-                break
-        next_state[i] = 1 if func_result else 0
-    return next_state
+            first = -(-start // self.k) * self.k  # primer múltiplo de k >= start
+            self.buffer[first // self.k:(end - 1) // self.k + 1] = rows[first - start::self.k]
+
+    def steps_needed(self, start: int, end: int) -> np.ndarray:
+        """Pasos de [start, end) cuyos estados debe recibir record_steps."""
+        if self.mode == 'none':
+            return np.array([end - 1])
+        if self.mode == 'last_k':
+            return np.arange(max(start, end - len(self.buffer)), end)
+        if self.mode == 'every_k':
+            return np.arange(-(-start // self.k) * self.k, end, self.k)
+        return np.arange(start, end)
+
+    def record_steps(self, indices: np.ndarray, rows: np.ndarray, end: int):
+        """Registra los estados rows de los pasos indices = steps_needed(start, end)."""
+        if self.mode == 'every_k':
+            self.buffer[indices // self.k] = rows
+            self.count = end
+        elif len(indices):
+            self.record_block(int(indices[0]), rows)
+
+    def result(self) -> np.ndarray:
+        if self.mode == 'last_k':
+            # Reordenar el búfer circular en orden cronológico
+            size = len(self.buffer)
+            return self.buffer[np.arange(self.count - size, self.count) % size]
+        if self.mode == 'memmap':
+            self.buffer.flush()
+        return self.buffer
+
 
 class Simulator:
-    def __init__(self, network: LocalNetwork):
+    def __init__(self, network: LocalNetwork, cache_size: int = 128, max_lut_fan_in: int = 10):
         self.network = network
+        self.max_lut_fan_in = max_lut_fan_in
         self.variables_map = {
             var.index: var for var in self.network.descriptive_function_variables
         }
 
         self.is_dynamic = any(callable(var.cnf_function) for var in self.variables_map.values())
 
+        self.external_keys = sorted(self.network.external_variables)
+
+        shared_dynamics = getattr(self.network, 'shared_dynamics', None)
+        if shared_dynamics is not None and not self.variables_map:
+            # Dinámica compartida de una plantilla: las reglas compiladas se reutilizan entre redes
+            self.static_rules = shared_dynamics.compile(self.external_keys, max_lut_fan_in)
+        elif not self.is_dynamic:
+            # La CNF se compila una sola vez a arreglos planos (CSR) con las
+            # variables externas ya resueltas a ranuras densas.
+            cnf_functions = [self.variables_map[k].cnf_function for k in sorted(self.variables_map.keys())]
+            self.static_rules = compile_cnf_rules(cnf_functions, self.external_keys, max_lut_fan_in=max_lut_fan_in)
+        else:
+            # Las variables estáticas se compilan una sola vez, con las externas como
+            # ranuras; en cada patrón de entradas solo se especializan las dinámicas.
+            ordered = [self.variables_map[k].cnf_function for k in sorted(self.variables_map.keys())]
+            self._dynamic_positions = np.array([i for i, f in enumerate(ordered) if callable(f)], dtype=np.int64)
+            self._dynamic_functions = [ordered[i] for i in self._dynamic_positions]
+            self.static_rules = compile_cnf_rules(
+                [None if callable(f) else f for f in ordered], self.external_keys, max_lut_fan_in=max_lut_fan_in
+            )
+            # Especializaciones de las funciones dinámicas por patrón de entradas externas (LRU)
+            self.cache_size = cache_size
+            self._rules_cache = OrderedDict()
+
+    def compiled_rules(self, external_values: dict = None) -> CompiledRules:
+        """
+        Devuelve las reglas compiladas de la red para unos valores externos (por
+        defecto, todos a 0), listas para los kernels de load_kernels().
+        """
+        return self._resolve_rules(external_values or {})
+
+    def _resolve_rules(self, external_values: dict) -> CompiledRules:
+        """
+        Devuelve las reglas compiladas. Las funciones dinámicas se resuelven una vez
+        por patrón de entradas externas: los callables se evalúan, solo sus cláusulas
+        se compilan (sin tablas de verdad) y se insertan en las reglas estáticas
+        precompiladas. El resultado se guarda en una caché LRU acotada.
+        """
         if not self.is_dynamic:
-            temp_rules = []
-            sorted_indices = sorted(self.variables_map.keys())
-            for var_index in sorted_indices:
-                variable = self.variables_map[var_index]
-                clauses_list = numba.typed.List()
-                if variable.cnf_function:
-                    for clause in variable.cnf_function:
-                        clauses_list.append(np.array(clause, dtype=np.int32))
-                temp_rules.append(clauses_list)
-            self.static_rules = numba.typed.List(temp_rules)
-
-    def _get_next_state_python(self, current_state: np.ndarray, external_values: dict = None) -> np.ndarray:
-        if external_values is None:
-            external_values = {}
-        next_state = np.zeros_like(current_state)
-        current_state_dict = {i + 1: current_state[i] for i in range(len(current_state))}
+            return self.static_rules
 
-        for var_index in sorted(self.variables_map.keys()):
-            variable = self.variables_map[var_index]
-            cnf_function = variable.cnf_function
+        try:
+            key = frozenset(external_values.items())
+        except TypeError:
+            key = None  # Valores no hashables: se compila sin caché
 
-            if callable(cnf_function):
-                cnf_function = cnf_function(external_values)
+        if key is not None and key in self._rules_cache:
+            self._rules_cache.move_to_end(key)
+            return self._rules_cache[key]
 
-            next_val = LocalNetwork.evaluate_boolean_function(
-                cnf_function, current_state_dict, external_values
-            )
-            next_state[var_index - 1] = next_val
-        return next_state
+        cnf_functions = [None] * self.static_rules.n_internal
+        for position, cnf_function in zip(self._dynamic_positions, self._dynamic_functions):
+            cnf_functions[position] = cnf_function(external_values)
+        specialized = compile_cnf_rules(cnf_functions, self.external_keys, max_lut_fan_in=-1)
+        rules = splice_rules(self.static_rules, self._dynamic_positions, specialized)
+
+        if key is not None and self.cache_size > 0:
+            self._rules_cache[key] = rules
+            if len(self._rules_cache) > self.cache_size:
+                self._rules_cache.popitem(last=False)
+        return rules
+
+    @staticmethod
+    def _step(current_state: np.ndarray, external_values: dict, rules: CompiledRules) -> np.ndarray:
+        return load_kernels()._accelerated_next_state(current_state, rules.external_array(external_values), *rules.kernel_args())
 
-    def run(self, initial_state: np.ndarray, steps: int, external_inputs: list = None) -> tuple[np.ndarray, str | None]:
+    def run(self, initial_state: np.ndarray, steps: int, external_inputs: list = None,
+            history: str = 'full', k: int = 1, path: str = None,
+            incremental: bool = False) -> tuple[np.ndarray, str | None]:
+        """
+        Simula la red y registra la historia según el modo elegido.
+
+        Args:
+            initial_state (np.ndarray): El estado inicial.
+            steps (int): Número de pasos a simular.
+            external_inputs (list, optional): Un diccionario de valores externos por paso.
+            history (str): Modo de registro de la historia:
+                'full': todos los estados, (steps + 1, n_vars).
+                'none': solo el estado final, (1, n_vars).
+                'last_k': los últimos k estados en orden cronológico (búfer circular).
+                'every_k': los estados de los pasos 0, k, 2k, ...
+                'bitpacked': todos los estados empaquetados con np.packbits, uint8.
+                'memmap': todos los estados en un archivo .npy en path, abierto como memmap.
+            k (int): Parámetro de los modos 'last_k' y 'every_k'.
+            path (str, optional): Ruta del archivo del modo 'memmap'.
+            incremental (bool): Si es True, cada paso reevalúa solo las variables con alguna
+                                entrada (interna o externa) que cambió, usando el índice
+                                inverso de dependencias de las reglas. Conviene cerca de
+                                puntos fijos o con actividad dispersa. Con funciones
+                                dinámicas exige que external_inputs sea constante.
+
+        Returns:
+            tuple[np.ndarray, None]: La historia registrada y None.
+        """
         if len(initial_state) != len(self.network.internal_variables):
             raise ValueError("El tamaño del estado inicial no coincide con el número de variables de la red.")
         if external_inputs and len(external_inputs) != steps:
             raise ValueError("La longitud de external_inputs debe ser igual al número de pasos.")
 
-        history = np.zeros((steps + 1, len(initial_state)), dtype=int)
-        history[0] = initial_state
-        current_state = initial_state.copy()
-        external_map = np.array(sorted(self.network.external_variables), dtype=np.int32)
+        recorder = _HistoryRecorder(history, steps, len(initial_state), k, path)
+        current_state = np.asarray(initial_state).copy()
+
+        if incremental:
+            # Por bloques dentro del kernel, con los valores externos de cada paso como matriz.
+            # El kernel devuelve solo los eventos de cambio y se reconstruyen los estados
+            # que el modo de historia necesita.
+            kernels = load_kernels()
+            rules, schedule = self._external_schedule(steps, external_inputs)
+            dependency_index, kernel_args = rules.dependency_index(), rules.kernel_args()
+            recorder.record_block(0, current_state[None, :])
+            for t in range(0, steps, _HISTORY_CHUNK):
+                chunk_schedule = np.ascontiguousarray(schedule[t:t + _HISTORY_CHUNK])
+                final_state, event_step, event_var = kernels._simulate_incremental(
+                    current_state, chunk_schedule, *dependency_index, *kernel_args
+                )
+                end = t + len(chunk_schedule) + 1
+                needed = recorder.steps_needed(t + 1, end)
+                rows = kernels._replay_events(current_state, event_step, event_var, needed - t)
+                recorder.record_steps(needed, rows, end)
+                current_state = final_state
+            return recorder.result(), None
+
+        if not external_inputs:
+            # Entradas constantes: se avanza por bloques dentro del kernel compilado
+            rules = self._resolve_rules({})
+            external_arr = rules.external_array({})
+            recorder.record_block(0, current_state[None, :])
+            t = 0
+            while t < steps:
+                chunk = min(_HISTORY_CHUNK, steps - t)
+                rows = load_kernels()._simulate(current_state, chunk, external_arr, *rules.kernel_args())
+                recorder.record_block(t + 1, rows[1:])
+                current_state = rows[-1]
+                t += chunk
+            return recorder.result(), None
+
+        recorder.record_block(0, current_state[None, :])
+        for i in range(steps):
+            current_external_dict = external_inputs[i]
+            rules = self._resolve_rules(current_external_dict)
+            current_state = self._step(current_state, current_external_dict, rules)
+            recorder.record_block(i + 1, current_state[None, :])
+
+        return recorder.result(), None # El simulador ya no reporta información de atractores
+
+    def _external_schedule(self, steps: int, external_inputs: list) -> tuple[CompiledRules, np.ndarray]:
+        """
+        Reglas y matriz (steps, n_externas) de valores externos por paso para el modo
+        incremental. Con funciones dinámicas las reglas dependen de las entradas, así
+        que solo se admite un patrón de entradas constante.
+        """
+        if not external_inputs:
+            rules = self._resolve_rules({})
+            external_arr = rules.external_array({})
+            return rules, np.broadcast_to(external_arr, (steps, len(external_arr)))
+
+        rules = self._resolve_rules(external_inputs[0])
+        if self.is_dynamic and any(inputs != external_inputs[0] for inputs in external_inputs[1:]):
+            raise ValueError("El modo incremental no admite entradas externas variables con funciones dinámicas.")
+        schedule = np.array([rules.external_array(inputs) for inputs in external_inputs], dtype=np.uint8)
+        return rules, schedule.reshape(steps, len(rules.external_array(external_inputs[0])))
+
+    def run_batch(self, initial_states: np.ndarray, steps: int, external_inputs: list = None) -> np.ndarray:
+        """
+        Avanza en paralelo un lote de condiciones iniciales usando evaluación
+        bit a bit de las cláusulas (64 trayectorias por palabra uint64).
+
+        Args:
+            initial_states (np.ndarray): Estados iniciales de forma (batch, n_vars).
+            steps (int): Número de pasos a simular.
+            external_inputs (list, optional): Un diccionario de valores externos por paso,
+                                              compartido por todas las trayectorias.
+
+        Returns:
+            np.ndarray: Los estados finales de forma (batch, n_vars).
+        """
+        initial_states = np.atleast_2d(initial_states)
+        if initial_states.shape[1] != len(self.network.internal_variables):
+            raise ValueError("El tamaño del estado inicial no coincide con el número de variables de la red.")
+        if external_inputs and len(external_inputs) != steps:
+            raise ValueError("La longitud de external_inputs debe ser igual al número de pasos.")
+
+        packed = pack_states(initial_states)
 
         for i in range(steps):
             current_external_dict = external_inputs[i] if external_inputs else {}
+            rules = self._resolve_rules(current_external_dict)
+            external_words = np.where(rules.external_array(current_external_dict) == 1, ~np.uint64(0), np.uint64(0))
+            packed = load_kernels()._bitwise_next_state(
+                packed, external_words, rules.var_ptr, rules.clause_ptr, rules.lit_slot, rules.lit_negated
+            )
+
+        return unpack_states(packed, len(initial_states))
 
-            if self.is_dynamic:
-                current_state = self._get_next_state_python(current_state, current_external_dict)
-            else:
-                external_arr = np.array([current_external_dict.get(k, 0) for k in sorted(self.network.external_variables)], dtype=np.int32)
-                current_state = _accelerated_next_state(current_state, self.static_rules, external_arr, external_map)
+    def run_until_attractor(self, initial_state: np.ndarray, external_values: dict = None,
+                            max_steps: int = 100000, return_trajectory: bool = False) -> tuple:
+        """
+        Simula dentro de un kernel compilado hasta que la trayectoria entra en un
+        atractor, con entradas externas constantes.
 
-            history[i + 1] = current_state
+        Args:
+            initial_state (np.ndarray): El estado inicial.
+            external_values (dict, optional): Valores de las variables externas.
+            max_steps (int): Número máximo de pasos a simular.
+            return_trajectory (bool): Si es True, añade al resultado los estados visitados
+                                      (transitorio y ciclo) en orden, (t, n_vars).
 
-        return history, None # El simulador ya no reporta información de atractores
+        Returns:
+            tuple[int, np.ndarray, int]: La longitud del transitorio, los estados del
+                                         ciclo (cycle_length, n_vars) y la longitud del
+                                         ciclo (1 para un punto fijo). Si no se encuentra
+                                         un atractor en max_steps, devuelve (-1, vacío, 0).
+        """
+        if len(initial_state) != len(self.network.internal_variables):
+            raise ValueError("El tamaño del estado inicial no coincide con el número de variables de la red.")
+        if external_values is None:
+            external_values = {}
+
+        rules = self._resolve_rules(external_values)
+        history, cycle_start, cycle_length = load_kernels()._run_until_attractor(
+            np.asarray(initial_state), rules.external_array(external_values), max_steps, *rules.kernel_args()
+        )
+        if cycle_start == -1:
+            result = (-1, np.zeros((0, len(initial_state)), dtype=int), 0)
+        else:
+            result = (cycle_start, history[cycle_start:cycle_start + cycle_length].astype(int), cycle_length)
+        return result + (history.astype(int),) if return_trajectory else result
@@ -0,0 +1,115 @@
+# cbn_neuroscience/core/state_space.py
+
+import numpy as np
+from cbn_neuroscience.core.compiled_rules import CompiledRules
+from cbn_neuroscience.core.simulation import Simulator, load_kernels
+
+# Patrones de bits de las 6 primeras variables dentro de una palabra de 64 estados
+_LOW_BIT_PATTERNS = np.array([
+    0xAAAAAAAAAAAAAAAA,
+    0xCCCCCCCCCCCCCCCC,
+    0xF0F0F0F0F0F0F0F0,
+    0xFF00FF00FF00FF00,
+    0xFFFF0000FFFF0000,
+    0xFFFFFFFF00000000,
+], dtype=np.uint64)
+
+def _enumerate_packed_states(num_vars: int) -> np.ndarray:
+    """
+    Devuelve los 2^n estados empaquetados en formato (n_vars, n_words): el estado
+    con código s ocupa el bit s % 64 de la palabra s // 64 y la variable i vale
+    el bit i de s.
+    """
+    num_words = max(1, (1 << num_vars) // 64)
+    word_index = np.arange(num_words, dtype=np.uint64)
+    packed = np.empty((num_vars, num_words), dtype=np.uint64)
+    for i in range(num_vars):
+        if i < 6:
+            packed[i] = _LOW_BIT_PATTERNS[i]
+        else:
+            packed[i] = np.where((word_index >> np.uint64(i - 6)) & np.uint64(1), ~np.uint64(0), np.uint64(0))
+    return packed
+
+
+class StateSpaceMap:
+    """
+    Tabla de transición completa de una red local pequeña y su descomposición
+    en atractores y cuencas de atracción.
+
+    Los estados se codifican como enteros: el bit i del código es el valor de la
+    variable interna en la posición i.
+    """
+    def __init__(self, num_vars: int, successors: np.ndarray, basin_of: np.ndarray, attractors: list):
+        self.num_vars = num_vars
+        self.successors = successors
+        self.basin_of = basin_of
+        self.attractors = attractors
+        self.basin_sizes = np.bincount(basin_of, minlength=len(attractors))
+
+    def encode(self, state: np.ndarray) -> int:
+        """Convierte un estado en su código entero."""
+        return int(np.dot(np.asarray(state) != 0, 1 << np.arange(self.num_vars)))
+
+    def decode(self, codes) -> np.ndarray:
+        """Convierte uno o varios códigos en estados (n_vars,) o (len(codes), n_vars)."""
+        codes = np.asarray(codes)
+        return ((codes[..., None] >> np.arange(self.num_vars)) & 1).astype(int)
+
+    def attractor_states(self, attractor: int) -> np.ndarray:
+        """Devuelve los estados del ciclo de un atractor, de forma (cycle_length, n_vars)."""
+        return self.decode(self.attractors[attractor])
+
+
+def map_state_space(simulator: Simulator, external_values: dict = None, max_variables: int = 25) -> StateSpaceMap:
+    """
+    Calcula el sucesor de los 2^n estados de la red en una sola pasada bit a bit
+    sobre las reglas compiladas y extrae todos los atractores con el tamaño de
+    sus cuencas.
+
+    Args:
+        simulator (Simulator): El simulador de la red local.
+        external_values (dict, optional): Valores constantes de las variables externas.
+        max_variables (int): Límite de variables para la enumeración exhaustiva.
+
+    Returns:
+        StateSpaceMap: La tabla de transición y su descomposición en atractores.
+    """
+    num_vars = len(simulator.network.internal_variables)
+    if num_vars > max_variables:
+        raise ValueError(f"La red tiene {num_vars} variables; la enumeración exhaustiva admite como máximo {max_variables}.")
+    if external_values is None:
+        external_values = {}
+
+    rules = simulator.compiled_rules(external_values)
+    return map_compiled_rules(rules, rules.external_array(external_values))
+
+
+def map_compiled_rules(rules: CompiledRules, external_arr: np.ndarray) -> StateSpaceMap:
+    """
+    Como map_state_space, pero a partir de reglas ya compiladas y del arreglo de
+    valores externos (CompiledRules.external_array). Es la forma que usan los
+    procesos de attractor_search, que solo reciben arreglos.
+    """
+    num_vars = rules.n_internal
+    num_states = 1 << num_vars
+    external_words = np.where(external_arr == 1, ~np.uint64(0), np.uint64(0))
+
+    packed_successors = load_kernels()._bitwise_next_state(
+        _enumerate_packed_states(num_vars), external_words,
+        rules.var_ptr, rules.clause_ptr, rules.lit_slot, rules.lit_negated
+    )
+    successors = load_kernels()._packed_to_codes(packed_successors, num_states)
+    basin_of, representatives = load_kernels()._functional_graph_basins(successors)
+
+    attractors = []
+    for representative in representatives:
+        cycle = [representative]
+        x = successors[representative]
+        while x != representative:
+            cycle.append(x)
+            x = successors[x]
+        # Rotar el ciclo para que empiece en su código mínimo
+        start = int(np.argmin(cycle))
+        attractors.append(np.array(cycle[start:] + cycle[:start], dtype=np.int32))
+
+    return StateSpaceMap(num_vars, successors, basin_of, attractors)
@@ -0,0 +1,79 @@
+# cbn_neuroscience/core/uncertainty.py
+
+import numpy as np
+from cbn_neuroscience.core.simulation import Simulator, load_kernels
+
+def uncertainty_sweep(simulator: Simulator, p_errors, n_trajectories: int, steps: int,
+                      initial_states: np.ndarray = None, external_values: dict = None,
+                      attractor_states: np.ndarray = None, seed: int = 0) -> dict:
+    """
+    Ejecuta n_trajectories trayectorias ruidosas (Sección 1.5.3) para cada valor de
+    p_error en una sola llamada compilada y devuelve estadísticas resumidas.
+
+    Cada trayectoria usa su propio flujo aleatorio basado en contador, derivado
+    de (seed, índice de p_error, índice de trayectoria), por lo que los resultados
+    son reproducibles e independientes del número de hilos.
+
+    Args:
+        simulator (Simulator): El simulador de la red local.
+        p_errors: Valores de probabilidad de inversión de cada bit por paso.
+        n_trajectories (int): Trayectorias por valor de p_error.
+        steps (int): Pasos por trayectoria.
+        initial_states (np.ndarray, optional): Estados iniciales (n_trajectories, n_vars).
+                                               Por defecto, aleatorios según seed.
+        external_values (dict, optional): Valores constantes de las variables externas.
+        attractor_states (np.ndarray, optional): Estados de referencia (m, n_vars). Por
+                                                 defecto, los de los atractores deterministas
+                                                 alcanzados desde los estados iniciales.
+        seed (int): Semilla de los flujos aleatorios.
+
+    Returns:
+        dict: Arreglos indexados por p_error:
+            'p_error', 'mean_dwell_time' (pasos medios entre cambios de estado),
+            'attractor_hit_rate' (fracción de trayectorias que tocan un atractor),
+            'attractor_occupancy' (fracción de pasos en estados de atractor),
+            'mean_first_hit' (primer paso medio en un atractor, NaN si ninguna lo toca)
+            y 'mean_density' (densidad media de actividad).
+    """
+    p_errors = np.atleast_1d(np.asarray(p_errors, dtype=np.float64))
+    num_vars = len(simulator.network.internal_variables)
+    if external_values is None:
+        external_values = {}
+
+    # Un flujo para los estados iniciales y uno por valor de p_error
+    initial_sequence, *p_sequences = np.random.SeedSequence(seed).spawn(len(p_errors) + 1)
+    if initial_states is None:
+        rng = np.random.default_rng(initial_sequence)
+        initial_states = rng.integers(0, 2, size=(n_trajectories, num_vars))
+    initial_states = np.ascontiguousarray(initial_states, dtype=np.uint8)
+    if initial_states.shape != (n_trajectories, num_vars):
+        raise ValueError("initial_states debe tener forma (n_trajectories, n_vars).")
+
+    if attractor_states is None:
+        cycles = [simulator.run_until_attractor(state, external_values)[1] for state in initial_states]
+        attractor_states = np.unique(np.concatenate(cycles), axis=0)
+    attractor_states = np.ascontiguousarray(attractor_states, dtype=np.uint8).reshape(-1, num_vars)
+    attractor_hashes = np.array([load_kernels()._hash_state(state) for state in attractor_states], dtype=np.uint64)
+    order = np.argsort(attractor_hashes)
+    attractor_hashes, attractor_states = attractor_hashes[order], attractor_states[order]
+
+    rules = simulator.compiled_rules(external_values)
+    external_arr = rules.external_array(external_values)
+
+    results = {key: np.zeros(len(p_errors)) for key in (
+        'mean_dwell_time', 'attractor_hit_rate', 'attractor_occupancy', 'mean_first_hit', 'mean_density'
+    )}
+    results['p_error'] = p_errors
+    for i, (p_error, child) in enumerate(zip(p_errors, p_sequences)):
+        streams = child.generate_state(n_trajectories, dtype=np.uint64)
+        n_dwells, attractor_steps, first_hit, density = load_kernels()._noisy_ensemble(
+            initial_states, steps, p_error, streams, external_arr, attractor_hashes, attractor_states,
+            *rules.kernel_args()
+        )
+        hits = first_hit >= 0
+        results['mean_dwell_time'][i] = np.mean((steps + 1) / n_dwells)
+        results['attractor_hit_rate'][i] = np.mean(hits)
+        results['attractor_occupancy'][i] = np.mean(attractor_steps) / (steps + 1)
+        results['mean_first_hit'][i] = np.mean(first_hit[hits]) if np.any(hits) else np.nan
+        results['mean_density'][i] = np.mean(density)
+    return results
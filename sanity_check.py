@@ -7,6 +7,7 @@ from cbn_neuroscience.core.laminar_template import LaminarColumnTemplate
 from cbn_neuroscience.core.factory import generate_laminar_cbn
 from cbn_neuroscience.core.simulation import Simulator
 from cbn_neuroscience.core.anticipation_engine import AnticipationMonitor
+from cbn_neuroscience.core.attractor_store import AttractorSet
 
 def run_sanity_check():
     """
@@ -31,12 +32,11 @@ def run_sanity_check():
 
     print(f"   - Columna creada con {len(column.internal_variables)} neuronas.")
 
-    # 2. Configurar el simulador y el monitor
-    print("\n2. Configurando el simulador y el monitor...")
+    # 2. Configurar el simulador
+    print("\n2. Configurando el simulador...")
     simulator = Simulator(column)
-    monitor = AnticipationMonitor()
 
-    # 3. Ejecutar la simulación
+    # 3. Ejecutar la simulación hasta el atractor, dentro del kernel compilado
     print("\n3. Ejecutando simulación...")
     initial_state = np.random.randint(0, 2, size=len(column.internal_variables))
     column.current_state = initial_state
@@ -46,26 +46,35 @@ def run_sanity_check():
 
     print(f"   - Estado inicial: {initial_state}")
 
-    # Bucle de simulación principal
-    for step in range(max_steps):
-        # El simulador calcula el siguiente estado determinista
-        # Para esta prueba simple, no hay entradas externas.
-        next_deterministic_state, _ = simulator.run(column.current_state, steps=1)
-
-        # La columna aplica la incertidumbre y actualiza su propio estado
-        current_state_arr = column.update_with_uncertainty(next_deterministic_state[1], p_error)
-
-        # El monitor comprueba la estabilidad
-        is_stable, message = monitor.check_stability(tuple(current_state_arr))
-
-        print(f"   Paso {step+1}: Estado -> {current_state_arr} | {message}")
-
+    # Para esta prueba simple, no hay entradas externas.
+    transient, cycle_states, cycle_length, trajectory = simulator.run_until_attractor(
+        initial_state, max_steps=max_steps, return_trajectory=True
+    )
+    if cycle_length == 0:
+        print(f"   - No se alcanzó un atractor en {max_steps} pasos.")
+        return
+    print(f"   - Transitorio: {transient} pasos | Longitud del ciclo: {cycle_length}")
+
+    # El monitor reconoce el concepto en cuanto la trayectoria entra en el atractor
+    attractors = AttractorSet(len(column.internal_variables), [cycle_states])
+    monitor = AnticipationMonitor(known_attractors=attractors)
+    for step, state in enumerate(trajectory):
+        is_stable, message = monitor.check_stability(state)
+        print(f"   Paso {step}: Estado -> {state} | {message}")
         if is_stable:
             print("\n   ¡Estabilidad alcanzada!")
             break
 
-    # 4. Medir la densidad de actividad
-    print("\n4. Analizando el estado final...")
+    # 4. Perturbar el atractor y comprobar si la red vuelve a él
+    print("\n4. Perturbando el atractor...")
+    perturbed_state = column.update_with_uncertainty(cycle_states[0], p_error)
+    _, perturbed_cycle, _ = simulator.run_until_attractor(perturbed_state, max_steps=max_steps)
+    returned = len(perturbed_cycle) > 0 and attractors.lookup(perturbed_cycle[0]) >= 0
+    print(f"   - Bits alterados: {int(np.sum(perturbed_state != cycle_states[0]))} | "
+          f"Vuelve al mismo atractor: {returned}")
+
+    # 5. Medir la densidad de actividad
+    print("\n5. Analizando el estado final...")
     final_density = column.get_sparse_density()
     print(f"   - Densidad de actividad (Sparsity) del estado final: {final_density:.2f}")
 
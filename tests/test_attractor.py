@@ -5,7 +5,7 @@ import numpy as np
 from cbnetwork.localnetwork import LocalNetwork
 from cbnetwork.internalvariable import InternalVariable
 from cbn_neuroscience.core.simulation import Simulator
-from cbn_neuroscience.core.anticipation_engine import AnticipationMonitor
+from cbn_neuroscience.core.anticipation_engine import AnticipationMonitor, BatchAnticipationMonitor
 
 class TestAttractorDetection(unittest.TestCase):
 
@@ -79,5 +79,109 @@ class TestAttractorDetection(unittest.TestCase):
 
         self.assertFalse(is_stable)
 
+    def test_monitor_structured_results(self):
+        """Prueba observe con arreglos numpy, la longitud del ciclo y el límite de historia."""
+        monitor = AnticipationMonitor()
+        states = np.array([[1, 0, 0], [0, 1, 0], [0, 0, 1], [1, 0, 0], [0, 1, 0]])
+        results = [monitor.observe(state) for state in states]
+
+        self.assertFalse(any(result.is_stable for result in results[:3]))
+        self.assertTrue(results[3].is_stable)
+        self.assertEqual((results[3].cycle_length, results[3].cycle_start, results[3].step), (3, 0, 3))
+        # El ciclo se sigue reconociendo en los pasos siguientes
+        self.assertEqual(results[4].cycle_length, 3)
+
+        # Con memoria de 2 estados el ciclo de longitud 3 no se detecta, pero un punto fijo sí
+        bounded = AnticipationMonitor(max_history=2)
+        self.assertFalse(any(bounded.observe(state).is_stable for state in states))
+        result = bounded.observe(states[-1])
+        self.assertTrue(result.is_fixed_point)
+
+    def test_brent_strategy(self):
+        """Prueba que la estrategia de Brent detecta los mismos ciclos que el registro."""
+        var1 = InternalVariable(index=1, cnf_function=[[1]])
+        var2 = InternalVariable(index=2, cnf_function=[[1], [3]])
+        var3 = InternalVariable(index=3, cnf_function=[[1], [-2]])
+        network = LocalNetwork(index=4, internal_variables=[1, 2, 3])
+        network.descriptive_function_variables = [var1, var2, var3]
+        simulator = Simulator(network)
+
+        for initial_state, expected_length in (([1, 0, 0], 4), ([0, 1, 1], 1)):
+            history, _ = simulator.run(np.array(initial_state), steps=30)
+            monitor = AnticipationMonitor(strategy='brent')
+            result = next(r for r in map(monitor.observe, history) if r.is_stable)
+            self.assertEqual(result.cycle_length, expected_length)
+            self.assertTrue(np.array_equal(history[result.step], history[result.cycle_start]))
+
+        with self.assertRaises(ValueError):
+            AnticipationMonitor(strategy='floyd')
+
+    def test_batch_monitor_matches_single_monitors(self):
+        """Prueba que el monitor por lotes reproduce el monitor individual en cada trayectoria."""
+        var1 = InternalVariable(index=1, cnf_function=[[2, -4]])
+        var2 = InternalVariable(index=2, cnf_function=[[3], [-1, 4]])
+        var3 = InternalVariable(index=3, cnf_function=[[-1]])
+        var4 = InternalVariable(index=4, cnf_function=[[1, 2], [-3]])
+        network = LocalNetwork(index=5, internal_variables=[1, 2, 3, 4])
+        network.descriptive_function_variables = [var1, var2, var3, var4]
+        simulator = Simulator(network)
+
+        rng = np.random.default_rng(0)
+        initial_states = rng.integers(0, 2, size=(200, 4))
+        histories = np.stack([simulator.run(state, steps=20)[0] for state in initial_states], axis=1)
+
+        # Capacidad inicial mínima para forzar el crecimiento de la tabla
+        monitor = BatchAnticipationMonitor(batch_size=200, initial_capacity=2)
+        for states in histories:
+            monitor.observe(states)
+        self.assertEqual(monitor.n_active, 0)
+
+        for b in range(200):
+            single = AnticipationMonitor()
+            result = next(r for r in map(single.observe, histories[:, b]) if r.is_stable)
+            self.assertEqual(monitor.recognition_step[b], result.step)
+            self.assertEqual(monitor.cycle_length[b], result.cycle_length)
+
+    def test_batch_monitor_hash_collision(self):
+        """Prueba que dos estados con el mismo hash pero distintos no se toman por un ciclo."""
+        monitor = BatchAnticipationMonitor(batch_size=1, initial_capacity=4)
+        monitor.observe(np.array([[1, 0, 1]]))
+        # Simular una colisión: la entrada guardada conserva su hash pero apunta a otro estado
+        monitor._state_buffer[0] = np.packbits([0, 1, 1])
+        hits = monitor.observe(np.array([[1, 0, 1]]))
+        self.assertFalse(hits[0])
+        # El estado se registra como nuevo y su repetición sí se reconoce
+        hits = monitor.observe(np.array([[1, 0, 1]]))
+        self.assertTrue(hits[0])
+        self.assertEqual((monitor.recognition_step[0], monitor.cycle_length[0]), (2, 1))
+
+    def test_run_until_attractor(self):
+        """Prueba la detección compilada del transitorio y del ciclo en una sola llamada."""
+        # Nodo 1 se mantiene; nodos 2 y 3 oscilan solo si el nodo 1 está activo
+        var1 = InternalVariable(index=1, cnf_function=[[1]])
+        var2 = InternalVariable(index=2, cnf_function=[[1], [3]])
+        var3 = InternalVariable(index=3, cnf_function=[[1], [-2]])
+
+        network = LocalNetwork(index=3, internal_variables=[1, 2, 3])
+        network.descriptive_function_variables = [var1, var2, var3]
+        simulator = Simulator(network)
+
+        # Con el nodo 1 activo: ciclo de longitud 4 sobre los nodos 2 y 3
+        transient, cycle_states, cycle_length = simulator.run_until_attractor(np.array([1, 0, 0]))
+        self.assertEqual(transient, 0)
+        self.assertEqual(cycle_length, 4)
+        self.assertEqual(cycle_states.shape, (4, 3))
+
+        # Con el nodo 1 inactivo: un paso de transitorio hasta el punto fijo [0, 0, 0]
+        transient, cycle_states, cycle_length = simulator.run_until_attractor(np.array([0, 1, 1]))
+        self.assertEqual(transient, 1)
+        self.assertEqual(cycle_length, 1)
+        np.testing.assert_array_equal(cycle_states, [[0, 0, 0]])
+
+        # Sin pasos suficientes no se reporta atractor
+        transient, cycle_states, cycle_length = simulator.run_until_attractor(np.array([1, 0, 0]), max_steps=2)
+        self.assertEqual(transient, -1)
+        self.assertEqual(cycle_length, 0)
+
 if __name__ == '__main__':
     unittest.main()
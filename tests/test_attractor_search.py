@@ -0,0 +1,95 @@
+# tests/test_attractor_search.py
+
+import random
+import unittest
+from types import SimpleNamespace
+import numpy as np
+from cbn_neuroscience.core.laminar_template import LaminarColumnTemplate
+from cbn_neuroscience.core.factory import generate_laminar_cbn
+from cbn_neuroscience.core import attractor_search
+from cbn_neuroscience.core.attractor_search import find_local_attractors
+
+class TestAttractorSearch(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(7)
+        template = LaminarColumnTemplate(
+            layer_sizes={'L2/3': 4, 'L4': 2, 'L5/6': 3},
+            n_input_variables=2,
+            n_output_variables=2
+        )
+        self.cbn = generate_laminar_cbn(template=template, n_local_networks=3)
+
+    def test_all_networks_and_combinations(self):
+        """Prueba que se cubren todas las redes y todas las combinaciones de señales de entrada."""
+        local_attractors = find_local_attractors(self.cbn, n_workers=1)
+
+        self.assertEqual(set(local_attractors), {net.index for net in self.cbn.l_local_networks})
+        for network in self.cbn.l_local_networks:
+            combinations = local_attractors[network.index]
+            self.assertEqual(len(combinations), 2 ** len(network.external_variables))
+            for cycles in combinations.values():
+                self.assertTrue(len(cycles) > 0)
+
+    def test_parallel_matches_serial(self):
+        """Prueba que el resultado del pool de procesos es idéntico al secuencial."""
+        serial = find_local_attractors(self.cbn, n_workers=1)
+        parallel = find_local_attractors(self.cbn, n_workers=2)
+
+        self.assertEqual(list(serial), list(parallel))
+        for network_index, combinations in serial.items():
+            self.assertEqual(list(combinations), list(parallel[network_index]))
+            for combination, cycles in combinations.items():
+                parallel_cycles = parallel[network_index][combination]
+                self.assertEqual(len(cycles), len(parallel_cycles))
+                for cycle, parallel_cycle in zip(cycles, parallel_cycles):
+                    np.testing.assert_array_equal(cycle, parallel_cycle)
+
+    def test_sampling_finds_exhaustive_attractors(self):
+        """Prueba que el muestreo en redes grandes solo encuentra atractores reales."""
+        exhaustive = find_local_attractors(self.cbn, n_workers=1)
+        sampled = find_local_attractors(self.cbn, n_workers=1, max_variables=0, n_samples=200)
+
+        for network_index, combinations in sampled.items():
+            for combination, cycles in combinations.items():
+                known = {cycle.tobytes() for cycle in exhaustive[network_index][combination]}
+                for cycle in cycles:
+                    self.assertIn(cycle.tobytes(), known)
+
+    def test_sampling_independent_of_other_networks(self):
+        """Prueba que las condiciones iniciales muestreadas de una red no dependen de las demás redes."""
+        sampled = find_local_attractors(self.cbn, n_workers=1, max_variables=0, n_samples=3)
+        reordered = SimpleNamespace(l_local_networks=self.cbn.l_local_networks[::-1])
+        sampled_reordered = find_local_attractors(reordered, n_workers=1, max_variables=0, n_samples=3)
+        last = self.cbn.l_local_networks[-1]
+        alone = find_local_attractors(SimpleNamespace(l_local_networks=[last]), n_workers=1, max_variables=0, n_samples=3)
+
+        for network_index, combinations in sampled.items():
+            for combination, cycles in combinations.items():
+                expected = [c.tobytes() for c in cycles]
+                self.assertEqual([c.tobytes() for c in sampled_reordered[network_index][combination]], expected)
+                if network_index == last.index:
+                    self.assertEqual([c.tobytes() for c in alone[network_index][combination]], expected)
+
+    def test_identical_networks_are_searched_once(self):
+        """Prueba que las redes con la misma huella comparten una única búsqueda."""
+        calls = []
+        original_task = attractor_search._local_attractors_task
+        attractor_search._local_attractors_task = lambda task: calls.append(task) or original_task(task)
+        try:
+            local_attractors = find_local_attractors(self.cbn, n_workers=1)
+        finally:
+            attractor_search._local_attractors_task = original_task
+
+        n_combinations = sum(2 ** len(net.external_variables) for net in self.cbn.l_local_networks)
+        self.assertLess(len(calls), n_combinations)
+        # Las redes de la plantilla con las mismas entradas tienen los mismos atractores
+        first, *others = [local_attractors[net.index] for net in self.cbn.l_local_networks]
+        for combinations in others:
+            for combination, cycles in combinations.items():
+                if combination in first:
+                    self.assertEqual([c.tobytes() for c in cycles], [c.tobytes() for c in first[combination]])
+
+
+if __name__ == '__main__':
+    unittest.main()
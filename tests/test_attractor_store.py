@@ -0,0 +1,71 @@
+# tests/test_attractor_store.py
+
+import tempfile
+import unittest
+import numpy as np
+from cbnetwork.localnetwork import LocalNetwork
+from cbnetwork.internalvariable import InternalVariable
+from cbn_neuroscience.core.simulation import Simulator
+from cbn_neuroscience.core.anticipation_engine import AnticipationMonitor
+from cbn_neuroscience.core.attractor_store import AttractorSet, AttractorStore, BasinIndex
+
+class TestAttractorStore(unittest.TestCase):
+
+    def make_simulator(self, max_lut_fan_in: int = 10) -> Simulator:
+        """Nodo 1 se mantiene; nodos 2 y 3 oscilan con el nodo 1 activo; el nodo 4 lee la externa 10."""
+        var1 = InternalVariable(index=1, cnf_function=[[1]])
+        var2 = InternalVariable(index=2, cnf_function=[[1], [3]])
+        var3 = InternalVariable(index=3, cnf_function=[[1], [-2]])
+        var4 = InternalVariable(index=4, cnf_function=[[10]])
+        network = LocalNetwork(index=0, internal_variables=[1, 2, 3, 4])
+        network.descriptive_function_variables = [var1, var2, var3, var4]
+        network.external_variables = [10]
+        return Simulator(network, max_lut_fan_in=max_lut_fan_in)
+
+    def test_fingerprint(self):
+        """Prueba que la huella es estable entre simuladores y distingue las entradas."""
+        fingerprint = AttractorStore.fingerprint(self.make_simulator(), {10: 1})
+        self.assertEqual(fingerprint, AttractorStore.fingerprint(self.make_simulator(max_lut_fan_in=0), {10: 1}))
+        self.assertNotEqual(fingerprint, AttractorStore.fingerprint(self.make_simulator(), {10: 0}))
+
+    def test_persistence_and_recognition(self):
+        """Prueba que los atractores guardados permiten reconocer en una ejecución posterior."""
+        with tempfile.TemporaryDirectory() as directory:
+            simulator = self.make_simulator()
+            attractors = AttractorStore(directory).update(simulator, np.array([[1, 0, 0, 0], [0, 1, 1, 0]]), {10: 1})
+            self.assertEqual(sorted(len(cycle) for cycle in attractors.cycles), [1, 4])
+
+            # Un simulador nuevo de la misma red recupera los atractores del disco
+            simulator = self.make_simulator()
+            store = AttractorStore(directory)
+            known = store.load(store.fingerprint(simulator, {10: 1}), 4)
+            self.assertEqual(len(known), 2)
+
+            monitor = AnticipationMonitor(known_attractors=known)
+            history, _ = simulator.run(np.array([1, 1, 0, 0]), 3, external_inputs=[{10: 1}] * 3)
+            result = monitor.observe(history[1])
+            self.assertTrue(result.is_stable)
+            self.assertEqual(result.step, 0)
+            self.assertEqual(result.cycle_length, 4)
+            self.assertEqual(known.lookup(history[1]), result.attractor)
+
+    def test_basin_index_early_recognition(self):
+        """Prueba que el índice de cuencas reconoce un estado transitorio antes de que la red se asiente."""
+        simulator = self.make_simulator()
+        basins = BasinIndex(AttractorSet(4)).update(simulator, np.array([[0, 1, 1, 0]]), {10: 0})
+        # [0, 1, 1, 0] -> [0, 0, 0, 0] (punto fijo): un estado transitorio indexado
+        self.assertEqual(len(basins), 1)
+        self.assertEqual(basins.lookup([0, 1, 1, 0]), basins.lookup([0, 0, 0, 0]))
+        self.assertEqual(basins.lookup([1, 1, 1, 1]), -1)
+
+        monitor = AnticipationMonitor(known_attractors=basins)
+        result = monitor.observe(np.array([0, 1, 1, 0]))
+        self.assertTrue(result.is_stable)
+        self.assertEqual((result.step, result.cycle_length), (0, 1))
+
+        _, _, _, trajectory = simulator.run_until_attractor(np.array([0, 1, 1, 0]), {10: 0}, return_trajectory=True)
+        np.testing.assert_array_equal(trajectory, [[0, 1, 1, 0], [0, 0, 0, 0]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+# tests/test_cbn_io.py
+
+import os
+import random
+import tempfile
+import unittest
+import numpy as np
+from cbn_neuroscience.core.laminar_template import LaminarColumnTemplate
+from cbn_neuroscience.core.factory import generate_laminar_cbn
+from cbn_neuroscience.core.cbn_simulator import CBNSimulator, compile_cbn
+from cbn_neuroscience.core.cbn_io import save_cbn, load_cbn
+
+class TestCBNIO(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(4)
+        template = LaminarColumnTemplate(
+            layer_sizes={'L2/3': 4, 'L4': 2, 'L5/6': 3},
+            n_input_variables=2,
+            n_output_variables=2
+        )
+        self.cbn = generate_laminar_cbn(template=template, n_local_networks=4)
+        self.compiled = compile_cbn(self.cbn)
+
+    def test_round_trip(self):
+        """Prueba que la CBN cargada (mapeada en memoria o leída) simula igual que la original."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cbn.bin')
+            save_cbn(self.cbn, path)
+            self.assertTrue(os.path.exists(path))
+
+            initial_state = np.random.default_rng(0).integers(0, 2, size=self.compiled.n_internal)
+            expected = CBNSimulator(self.compiled).run(initial_state, 20)
+            for mmap in (True, False):
+                loaded = load_cbn(path, mmap=mmap)
+                self.assertEqual(isinstance(loaded.rules.lit_slot, np.memmap), mmap)
+                np.testing.assert_array_equal(loaded.network_indices, self.compiled.network_indices)
+                np.testing.assert_array_equal(loaded.edge_networks, self.compiled.edge_networks)
+                self.assertEqual(loaded.layer_map, self.compiled.layer_map)
+                np.testing.assert_array_equal(CBNSimulator(loaded).run(initial_state, 20), expected)
+                del loaded
+
+
+if __name__ == '__main__':
+    unittest.main()
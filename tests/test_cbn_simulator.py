@@ -0,0 +1,127 @@
+# tests/test_cbn_simulator.py
+
+import random
+import unittest
+import numpy as np
+from cbnetwork.cbnetwork import CBN
+from cbnetwork.directededge import DirectedEdge
+from cbnetwork.internalvariable import InternalVariable
+from cbnetwork.localnetwork import LocalNetwork
+from cbn_neuroscience.core.simulation import Simulator
+from cbn_neuroscience.core.cbn_simulator import CBNSimulator
+from cbn_neuroscience.core.factory import generate_laminar_cbn
+from cbn_neuroscience.core.laminar_template import LaminarColumnTemplate
+
+class TestCBNSimulator(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Dos redes de 2 variables acopladas en ambos sentidos:
+        señal 5 = OR(3, 4) entra a la red 1 y señal 6 = OR(1) entra a la red 2.
+        """
+        network1 = LocalNetwork(index=1, internal_variables=[1, 2])
+        network2 = LocalNetwork(index=2, internal_variables=[3, 4])
+        edge_to_1 = DirectedEdge(index=1, index_variable_signal=5, input_local_network=1, output_local_network=2,
+                                 l_output_variables=[3, 4], coupling_function=" 3 ∨ 4 ")
+        edge_to_2 = DirectedEdge(index=2, index_variable_signal=6, input_local_network=2, output_local_network=1,
+                                 l_output_variables=[1], coupling_function=" 1 ")
+        network1.process_input_signals([edge_to_1])
+        network2.process_input_signals([edge_to_2])
+
+        # Los literales internos son posicionales dentro de cada red, como en Simulator
+        network1.descriptive_function_variables = [
+            InternalVariable(index=1, cnf_function=[[-2, 5]]),
+            InternalVariable(index=2, cnf_function=[[1]]),
+        ]
+        network2.descriptive_function_variables = [
+            InternalVariable(index=3, cnf_function=[[6], [-4]]),
+            InternalVariable(index=4, cnf_function=[[1, 2]]),
+        ]
+        self.cbn = CBN(l_local_networks=[network1, network2], l_directed_edges=[edge_to_1, edge_to_2])
+
+    def _reference_run(self, internal_state, signals, steps):
+        """Propagación manual de las señales con un Simulator por red."""
+        simulators = [Simulator(net) for net in self.cbn.l_local_networks]
+        history = [np.concatenate([internal_state, signals])]
+        for _ in range(steps):
+            external = {5: signals[0], 6: signals[1]}
+            next_internal = np.concatenate([
+                simulators[0].run(internal_state[:2], 1, [external])[0][1],
+                simulators[1].run(internal_state[2:], 1, [external])[0][1],
+            ])
+            signals = np.array([int(internal_state[2] or internal_state[3]), int(internal_state[0])])
+            internal_state = next_internal
+            history.append(np.concatenate([internal_state, signals]))
+        return np.array(history)
+
+    def test_run_matches_manual_propagation(self):
+        """Prueba que el kernel global coincide con la propagación manual entre redes."""
+        simulator = CBNSimulator(self.cbn)
+        self.assertEqual(simulator.compiled.n_state, 6)
+        self.assertEqual(simulator.network_slice(2), slice(2, 4))
+
+        rng = np.random.default_rng(3)
+        for _ in range(10):
+            initial_state = rng.integers(0, 2, size=6)
+            expected = self._reference_run(initial_state[:4], initial_state[4:], steps=8)
+            np.testing.assert_array_equal(simulator.run(initial_state, 8), expected)
+
+    def test_batch_and_attractor(self):
+        """Prueba el modo por lotes y la detección de atractores globales."""
+        simulator = CBNSimulator(self.cbn)
+        rng = np.random.default_rng(4)
+        initial_states = rng.integers(0, 2, size=(70, 6))
+
+        final_states = simulator.run_batch(initial_states, 5)
+        for state, final_state in zip(initial_states, final_states):
+            np.testing.assert_array_equal(final_state, simulator.run(state, 5)[-1])
+
+        transient, cycle_states, cycle_length = simulator.run_until_attractor(initial_states[0])
+        self.assertGreater(cycle_length, 0)
+        history = simulator.run(initial_states[0], transient + cycle_length)
+        np.testing.assert_array_equal(history[transient], history[transient + cycle_length])
+        np.testing.assert_array_equal(cycle_states[0], history[transient])
+
+    def test_internal_only_initial_state(self):
+        """Prueba que un estado solo con variables internas completa sus señales."""
+        simulator = CBNSimulator(self.cbn)
+        history = simulator.run(np.array([1, 0, 0, 1]), 1)
+        np.testing.assert_array_equal(history[0], [1, 0, 0, 1, 1, 1])
+
+    def test_generated_cbn(self):
+        """Prueba que una CBN de la fábrica laminar se aplana en un único estado global."""
+        random.seed(11)
+        template = LaminarColumnTemplate(
+            layer_sizes={'L2/3': 4, 'L4': 2, 'L5/6': 3},
+            n_input_variables=2,
+            n_output_variables=2
+        )
+        cbn = generate_laminar_cbn(template=template, n_local_networks=4)
+        simulator = CBNSimulator(cbn)
+
+        self.assertEqual(simulator.compiled.n_state, 4 * 9 + len(cbn.l_directed_edges))
+        history = simulator.run(np.zeros(4 * 9, dtype=int), 10)
+        self.assertEqual(history.shape, (11, simulator.compiled.n_state))
+
+    def test_generated_cbn_reads_coupling_signals(self):
+        """Prueba que en una CBN de la fábrica el estado de la red emisora cambia la trayectoria de la receptora."""
+        template = LaminarColumnTemplate(
+            layer_sizes={'L2/3': 4, 'L4': 2, 'L5/6': 3},
+            n_input_variables=2,
+            n_output_variables=2,
+            seed=0
+        )
+        for shared_dynamics in (False, True):
+            cbn = generate_laminar_cbn(template=template, n_local_networks=2, seed=1, shared_dynamics=shared_dynamics)
+            simulator = CBNSimulator(cbn)
+            upstream, downstream = simulator.network_slice(1), simulator.network_slice(2)
+
+            initial_state = np.zeros(simulator.compiled.n_internal, dtype=int)
+            flipped = initial_state.copy()
+            flipped[upstream] = 1
+            self.assertFalse(np.array_equal(simulator.run(initial_state, 10)[:, downstream],
+                                            simulator.run(flipped, 10)[:, downstream]))
+
+
+if __name__ == '__main__':
+    unittest.main()
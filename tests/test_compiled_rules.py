@@ -0,0 +1,79 @@
+# tests/test_compiled_rules.py
+
+import unittest
+import numpy as np
+from cbn_neuroscience.core.compiled_rules import compile_cnf_rules, splice_rules
+
+class TestCompiledRules(unittest.TestCase):
+
+    def test_csr_layout(self):
+        """Prueba el aplanado CSR y la resolución de variables externas a ranuras densas."""
+        # Variable 1: (2 ∨ ¬20) ∧ (10); Variable 2: sin cláusulas; Variable 3: (¬1 ∨ 99)
+        cnf_functions = [[[2, -20], [10]], [], [[-1, 99]]]
+        rules = compile_cnf_rules(cnf_functions, external_variables=[20, 10])
+
+        np.testing.assert_array_equal(rules.var_ptr, [0, 2, 2, 3])
+        np.testing.assert_array_equal(rules.clause_ptr, [0, 2, 3, 5])
+        # Externas ordenadas: 10 -> ranura 3, 20 -> ranura 4; la 99 no existe -> ranura cero (5)
+        np.testing.assert_array_equal(rules.lit_slot, [1, 4, 3, 0, 5])
+        np.testing.assert_array_equal(rules.lit_negated, [0, 1, 0, 1, 0])
+        self.assertEqual(rules.zero_slot, 5)
+
+        slots = rules.extended_state(np.array([1, 0, 1]), np.array([1, 0]))
+        np.testing.assert_array_equal(slots, [1, 0, 1, 1, 0, 0])
+
+    def test_constant_folding(self):
+        """Prueba que los valores externos fijos se pliegan durante la compilación."""
+        # Variable 1: (2 ∨ 10) ∧ (¬10 ∨ 1) ∧ (20); con 10 = 1 y 20 = 0
+        cnf_functions = [[[2, 10], [-10, 1], [20]], [[1]]]
+        rules = compile_cnf_rules(cnf_functions, external_variables=[10, 20, 30], constants={10: 1, 20: 0})
+
+        # (2 ∨ 10) desaparece, (¬10 ∨ 1) queda en (1) y (20) queda como cláusula vacía (falsa)
+        np.testing.assert_array_equal(rules.var_ptr, [0, 2, 3])
+        np.testing.assert_array_equal(rules.clause_ptr, [0, 1, 1, 2])
+        np.testing.assert_array_equal(rules.lit_slot, [0, 0])
+        self.assertEqual(rules.external_keys, [30])
+
+    def test_truth_tables(self):
+        """Prueba que las variables de fan-in bajo se tabulan y las demás quedan en el evaluador de cláusulas."""
+        # Variable 1: (2 ∨ ¬3) ∧ (1); Variable 2: (1 ∨ 2 ∨ 3 ∨ 4) con 4 entradas, sin tabla
+        cnf_functions = [[[2, -3], [1]], [[1, 2, 3, 4]], [[1]], [[-4]]]
+        rules = compile_cnf_rules(cnf_functions, external_variables=[], max_lut_fan_in=3)
+
+        np.testing.assert_array_equal(rules.lut_offset, [0, -1, 8, 10])
+        np.testing.assert_array_equal(rules.lut_ptr, [0, 3, 3, 4, 5])
+        np.testing.assert_array_equal(rules.lut_inputs, [0, 1, 2, 0, 3])
+        # Índice de la tabla de la variable 1: bit 0 = x1, bit 1 = x2, bit 2 = x3
+        expected = [x1 and (x2 or not x3) for x3 in (0, 1) for x2 in (0, 1) for x1 in (0, 1)]
+        np.testing.assert_array_equal(rules.lut_table[:8], expected)
+        np.testing.assert_array_equal(rules.lut_table[8:], [0, 1, 1, 0])
+
+    def test_dependency_index(self):
+        """Prueba el índice inverso ranura -> variables que la leen."""
+        # Variable 1: (2 ∨ ¬2) ∧ (10); Variable 2: (1 ∨ 3); Variable 3: (1)
+        cnf_functions = [[[2, -2], [10]], [[1, 3]], [[1]]]
+        rules = compile_cnf_rules(cnf_functions, external_variables=[10])
+
+        dep_ptr, dep_vars = rules.dependency_index()
+        # Ranura 0 (x1) -> variables 2 y 3; ranura 1 (x2) -> 1; ranura 2 (x3) -> 2; ranura 3 (ext 10) -> 1
+        np.testing.assert_array_equal(dep_ptr, [0, 2, 3, 4, 5, 5])
+        np.testing.assert_array_equal(dep_vars, [1, 2, 0, 1, 0])
+
+    def test_splice_rules(self):
+        """Prueba que insertar funciones en unas variables equivale a compilar la red completa."""
+        # Variables 2 y 4 sustituidas; 1 y 3 conservan su tabla de verdad
+        static = [[[2, -3], [10]], None, [[1]], None]
+        replacement = [None, [[1, -10], [3], [4, 2]], None, [[-2]]]
+        base = compile_cnf_rules(static, external_variables=[10], max_lut_fan_in=3)
+        rules = splice_rules(base, np.array([1, 3]), compile_cnf_rules(replacement, [10], max_lut_fan_in=-1))
+
+        full = compile_cnf_rules([static[0], replacement[1], static[2], replacement[3]], [10], max_lut_fan_in=-1)
+        for name in ('var_ptr', 'clause_ptr', 'lit_slot', 'lit_negated'):
+            np.testing.assert_array_equal(getattr(rules, name), getattr(full, name))
+        np.testing.assert_array_equal(rules.lut_offset, [base.lut_offset[0], -1, base.lut_offset[2], -1])
+        np.testing.assert_array_equal(rules.lut_ptr, [0, 3, 3, 4, 4])
+        np.testing.assert_array_equal(rules.lut_inputs, [1, 2, 4, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,13 @@
 # tests/test_factory.py
 
+import random
 import unittest
+import numpy as np
 from cbn_neuroscience.core.laminar_template import LaminarColumnTemplate
 from cbn_neuroscience.core.laminar_column import LaminarColumn
 from cbn_neuroscience.core.factory import generate_laminar_cbn
+from cbn_neuroscience.core.simulation import Simulator
+from cbn_neuroscience.core.cbn_simulator import CBNSimulator
 
 class TestFactory(unittest.TestCase):
 
@@ -54,6 +58,113 @@ class TestFactory(unittest.TestCase):
 
             self.assertEqual(network_internal_vars, expected_nodes_in_network)
 
+    def test_edge_routing_and_dynamics(self):
+        """Prueba que cada red recibe sus ejes de entrada y las CNF de su posición en la plantilla."""
+        template = LaminarColumnTemplate(
+            layer_sizes={'L2/3': 4, 'L4': 2, 'L5/6': 3},
+            n_input_variables=2,
+            n_output_variables=2
+        )
+        cbn = generate_laminar_cbn(template=template, n_local_networks=4)
+
+        for network in cbn.l_local_networks:
+            expected = [edge.index_variable for edge in cbn.l_directed_edges
+                        if edge.input_local_network == network.index]
+            self.assertEqual(network.external_variables, expected)
+
+            self.assertEqual([var.index for var in network.descriptive_function_variables], network.internal_variables)
+            # Las señales de entrada de la plantilla se leen de los ejes de la red, en orden
+            d_signal = dict(zip(template.l_input_coupling_signal_indexes, network.external_variables))
+            for position, var in enumerate(network.descriptive_function_variables, start=1):
+                expected_cnf = [[d_signal.get(abs(l), abs(l)) * (1 if l > 0 else -1) for l in clause]
+                                for clause in template.d_variable_cnf_function.get(position, [])]
+                self.assertEqual(var.cnf_function, expected_cnf)
+
+        for edge in cbn.l_directed_edges:
+            output_network = next(net for net in cbn.l_local_networks if net.index == edge.output_local_network)
+            offset = output_network.internal_variables[0] - 1
+            self.assertEqual([var - offset for var in edge.l_output_variables], sorted(template.l_output_var_indexes))
+
+    def test_shared_dynamics(self):
+        """Prueba que la dinámica compartida se compila una vez y simula igual que las variables materializadas."""
+        template = LaminarColumnTemplate(
+            layer_sizes={'L2/3': 4, 'L4': 2, 'L5/6': 3},
+            n_input_variables=2,
+            n_output_variables=2
+        )
+        random.seed(3)
+        cbn = generate_laminar_cbn(template=template, n_local_networks=3)
+        random.seed(3)
+        shared_cbn = generate_laminar_cbn(template=template, n_local_networks=3, shared_dynamics=True)
+
+        self.assertTrue(all(not net.descriptive_function_variables for net in shared_cbn.l_local_networks))
+        simulators = [Simulator(net) for net in shared_cbn.l_local_networks]
+        self.assertIs(simulators[0].static_rules.lit_slot, simulators[1].static_rules.lit_slot)
+
+        initial_state = np.random.default_rng(0).integers(0, 2, size=9)
+        for network, simulator in zip(cbn.l_local_networks, simulators):
+            np.testing.assert_array_equal(simulator.run(initial_state, 10)[0], Simulator(network).run(initial_state, 10)[0])
+
+        initial_state = np.random.default_rng(1).integers(0, 2, size=27)
+        np.testing.assert_array_equal(CBNSimulator(shared_cbn).run(initial_state, 10), CBNSimulator(cbn).run(initial_state, 10))
+
+    def test_seeded_heterogeneous_generation(self):
+        """Prueba que una semilla produce la misma CBN en serie y en paralelo sin alterar random."""
+        template = LaminarColumnTemplate(
+            layer_sizes={'L2/3': 4, 'L4': 2, 'L5/6': 3},
+            n_input_variables=2,
+            n_output_variables=2,
+            seed=5
+        )
+        again = LaminarColumnTemplate(
+            layer_sizes={'L2/3': 4, 'L4': 2, 'L5/6': 3},
+            n_input_variables=2,
+            n_output_variables=2,
+            seed=5
+        )
+        self.assertEqual(template.d_variable_cnf_function, again.d_variable_cnf_function)
+
+        random.seed(0)
+        state = random.getstate()
+        serial = generate_laminar_cbn(template, n_local_networks=6, seed=123, heterogeneous_dynamics=True)
+        self.assertEqual(random.getstate(), state)
+        parallel = generate_laminar_cbn(template, n_local_networks=6, seed=123, heterogeneous_dynamics=True,
+                                        n_workers=2)
+
+        def dynamics(cbn):
+            return [[var.cnf_function for var in net.descriptive_function_variables] for net in cbn.l_local_networks]
+
+        self.assertEqual(dynamics(serial), dynamics(parallel))
+        self.assertEqual([(e.input_local_network, e.output_local_network) for e in serial.l_directed_edges],
+                         [(e.input_local_network, e.output_local_network) for e in parallel.l_directed_edges])
+        # Cada red tiene su propio flujo: las dinámicas no son copias de la plantilla
+        self.assertGreater(len({str(cnfs) for cnfs in dynamics(serial)}), 1)
+
+    def test_seeded_topology(self):
+        """Prueba que con semilla la topología se muestrea en el paquete a partir de su flujo."""
+        template = LaminarColumnTemplate(
+            layer_sizes={'L2/3': 4, 'L4': 2, 'L5/6': 3},
+            n_input_variables=2,
+            n_output_variables=2,
+            seed=5
+        )
+
+        def relations(cbn):
+            return [(e.output_local_network, e.input_local_network) for e in cbn.l_directed_edges]
+
+        cycle = generate_laminar_cbn(template, n_local_networks=4, v_topology=3, seed=1)
+        self.assertEqual(relations(cycle), [(1, 2), (2, 3), (3, 4), (4, 1)])
+        path = generate_laminar_cbn(template, n_local_networks=4, v_topology=4, seed=1)
+        self.assertEqual(relations(path), [(1, 2), (2, 3), (3, 4)])
+
+        sampled = [relations(generate_laminar_cbn(template, n_local_networks=8, v_topology=2, seed=s))
+                   for s in (7, 7, 8)]
+        self.assertEqual(sampled[0], sampled[1])
+        self.assertNotEqual(sampled[0], sampled[2])
+
+        with self.assertRaises(ValueError):
+            generate_laminar_cbn(template, n_local_networks=4, v_topology=99, seed=1)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,7 +1,9 @@
 # tests/test_laminar.py
 
+import random
 import unittest
-from cbn_neuroscience.core.laminar_template import LaminarColumnTemplate
+import numpy as np
+from cbn_neuroscience.core.laminar_template import LaminarColumnTemplate, _sample_cnf_functions
 
 class TestLaminarNetwork(unittest.TestCase):
 
@@ -51,5 +53,43 @@ class TestLaminarNetwork(unittest.TestCase):
         for output_var in self.template.l_output_var_indexes:
             self.assertIn(output_var, self.template.layers['L5/6'])
 
+    def test_input_signals_and_seed(self):
+        """Prueba que cada señal de entrada entra por un único nodo de L4 y que random.seed fija la dinámica."""
+        random.seed(7)
+        template = LaminarColumnTemplate(layer_sizes=self.layer_sizes, n_input_variables=2, n_output_variables=2)
+
+        signal_targets = {}
+        for var_index, cnf in template.d_variable_cnf_function.items():
+            self.assertTrue(all(1 <= len(clause) for clause in cnf))
+            for literal in (literal for clause in cnf for literal in clause):
+                if abs(literal) > self.total_vars:
+                    signal_targets.setdefault(literal, []).append(var_index)
+        self.assertEqual(sorted(signal_targets), [self.total_vars + 1, self.total_vars + 2])
+        for targets in signal_targets.values():
+            self.assertEqual(len(targets), 1)
+            self.assertIn(targets[0], template.layers['L4'])
+
+        random.seed(7)
+        again = LaminarColumnTemplate(layer_sizes=self.layer_sizes, n_input_variables=2, n_output_variables=2)
+        self.assertEqual(again.d_variable_cnf_function, template.d_variable_cnf_function)
+
+    def test_max_history_forwarded(self):
+        """Prueba que las columnas creadas por la plantilla heredan su max_history."""
+        template = LaminarColumnTemplate(layer_sizes=self.layer_sizes, n_input_variables=self.n_inputs,
+                                         n_output_variables=self.n_outputs, max_history=3)
+        column = template.create_network(index=1, internal_variables=list(range(1, self.total_vars + 1)))
+        self.assertEqual(column.activity_history.maxlen, 3)
+
+    def test_sampled_clauses_have_distinct_variables(self):
+        """Prueba que las cláusulas no repiten variable y conservan la longitud sorteada, aun con pesos sesgados."""
+        variables = np.arange(1, 11)
+        p = np.full(10, 0.01)
+        p[0] = 0.91
+        cnf_functions = _sample_cnf_functions(np.random.default_rng(0), variables, p, 2000, 2, 3)
+        clauses = [clause for cnf in cnf_functions for clause in cnf]
+        self.assertTrue(all(len({abs(literal) for literal in clause}) == len(clause) for clause in clauses))
+        # Longitudes uniformes en {1, 2, 3}: media 2
+        self.assertAlmostEqual(np.mean([len(clause) for clause in clauses]), 2.0, delta=0.1)
+
 if __name__ == '__main__':
     unittest.main()
@@ -4,6 +4,8 @@ import numpy as np
 import pytest
 from cbn_neuroscience.core.rate_nodegroup import RateNodeGroup
 from cbn_neuroscience.core.compartmental_column import CompartmentalColumn
+from cbn_neuroscience.core.lif_nodegroup import LIF_NodeGroup
+from cbn_neuroscience.core.connections import Projection
 from cbn_neuroscience.core.network_simulator import NetworkSimulator
 
 def test_connection_manager_initialization():
@@ -34,3 +36,80 @@ def test_connection_manager_initialization():
     # El peso de la conexión de Col 1 -> Col 0 (no definida) debería ser 0
     weight_undefined = simulator.connection_manager.get_weight(1, 'L5', 0, 'L5')
     assert np.isclose(weight_undefined, 0.0)
+
+def test_sparse_weight_backend():
+    """
+    Valida que el backend disperso conserva la semántica de get_weight/update_weight
+    y que los accesos en bloque coinciden con el backend denso.
+    """
+    rate_params = {'tau_A': 10.0}
+    rules = [
+        {'sources': [(0, 'L5')], 'target_col': 1, 'target_layer': 'L5', 'weight': 0.8},
+        {'sources': [(1, 'L5'), (2, 'L5')], 'target_col': 0, 'target_layer': 'L5', 'weight': 0.3}
+    ]
+    managers = {}
+    for backend in ('dense', 'sparse'):
+        columns = [
+            CompartmentalColumn(index=i, n_nodes_per_layer={'L5': 1}, model_class=RateNodeGroup, model_params=rate_params)
+            for i in range(3)
+        ]
+        managers[backend] = NetworkSimulator(columns, rules, weight_backend=backend).connection_manager
+
+    dense, sparse = managers['dense'], managers['sparse']
+    assert sparse.weights.shape == (3, 3)
+    assert sparse.weights.nnz == 3
+    assert np.isclose(sparse.get_weight(0, 'L5', 1, 'L5'), 0.8)
+    assert np.isclose(sparse.get_weight(1, 'L5', 2, 'L5'), 0.0)
+    np.testing.assert_array_equal(sparse.get_weights(), dense.get_weights())
+
+    for manager in (dense, sparse):
+        manager.update_weight(2, 'L5', 0, 'L5', 0.5)
+        manager.set_weights(manager.get_weights() * 2)
+    np.testing.assert_array_equal(sparse.weights.toarray(), dense.weights)
+    np.testing.assert_array_equal(sparse.weight_matrix().toarray(), dense.weight_matrix().toarray())
+
+    # Una entrada no definida se inserta al actualizarla; en bloque prevalece el último valor
+    sparse.update_weight(1, 'L5', 2, 'L5', 0.7)
+    sparse.set_weights([0.1, 0.2], np.array([0, 0]), np.array([0, 0]))
+    assert sparse.weights.nnz == 5
+    np.testing.assert_array_equal(sparse.get_weights(np.array([2, 0, 1]), np.array([1, 0, 1])), [0.7, 0.2, 0.0])
+
+    with pytest.raises(ValueError):
+        NetworkSimulator([], rules, weight_backend='coo')
+
+def test_projection_propagation():
+    """
+    Valida que una proyección neurona a neurona reparte los spikes de la capa fuente
+    en corrientes excitatorias e inhibitorias por neurona destino.
+    """
+    weights = np.array([[0.5, 0.0, -0.2],
+                        [0.0, 0.0, 0.0]])
+    projection = Projection((0, 'L4'), (1, 'L5'), weights)
+    assert projection.n_synapses == 2
+    exc, inh = projection.propagate(np.array([True, False, True]))
+    np.testing.assert_allclose(exc, [0.5, 0.0])
+    np.testing.assert_allclose(inh, [0.2, 0.0])
+
+    random_projection = Projection.random((0, 'L4'), (1, 'L5'), 200, 100, 0.1, 0.3, seed=1)
+    assert random_projection.weights.shape == (100, 200)
+    np.testing.assert_allclose(random_projection.weights.data, 0.3)
+
+    columns = [
+        CompartmentalColumn(index=0, n_nodes_per_layer={'L4': 3}, model_class=LIF_NodeGroup, model_params={}),
+        CompartmentalColumn(index=1, n_nodes_per_layer={'L5': 2}, model_class=LIF_NodeGroup, model_params={})
+    ]
+    simulator = NetworkSimulator(columns, [], projections=[projection])
+    columns[0].layers['L4'].spikes[:] = [True, False, True]
+    simulator.run_step(0, {})
+    target = columns[1].layers['L5']
+    np.testing.assert_allclose(target.I_syn_exc, [0.5, 0.0])
+    np.testing.assert_allclose(target.I_syn_inh, [0.2, 0.0])
+
+    with pytest.raises(ValueError):
+        NetworkSimulator(columns, [], projections=[Projection((1, 'L5'), (0, 'L4'), weights)])
+
+    # Reasignar los pesos (p. ej. tras plasticidad) cambia la propagación
+    projection.weights = projection.weights * 2
+    exc, inh = projection.propagate(np.array([True, False, True]))
+    np.testing.assert_allclose(exc, [1.0, 0.0])
+    np.testing.assert_allclose(inh, [0.4, 0.0])
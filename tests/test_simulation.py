@@ -1,10 +1,16 @@
 # tests/test_simulation.py
 
+import os
+import subprocess
+import sys
+import tempfile
+import time
 import unittest
 import numpy as np
 from cbnetwork.localnetwork import LocalNetwork
 from cbnetwork.internalvariable import InternalVariable
-from cbn_neuroscience.core.simulation import Simulator
+from cbn_neuroscience.core.compiled_rules import compile_cnf_rules
+from cbn_neuroscience.core.simulation import Simulator, load_kernels, warmup
 
 class TestSimulation(unittest.TestCase):
 
@@ -47,6 +53,41 @@ class TestSimulation(unittest.TestCase):
 
         np.testing.assert_array_equal(history, expected_history)
 
+    def test_history_modes(self):
+        """Prueba que los modos de historia acotada coinciden con la historia completa."""
+        # Suficientes pasos para cruzar varios bloques del kernel
+        steps = 10000
+        initial_state = np.array([1, 0, 0])
+        full, _ = self.simulator.run(initial_state, steps)
+
+        final, _ = self.simulator.run(initial_state, steps, history='none')
+        np.testing.assert_array_equal(final, full[-1:])
+
+        last, _ = self.simulator.run(initial_state, steps, history='last_k', k=5)
+        np.testing.assert_array_equal(last, full[-5:])
+
+        decimated, _ = self.simulator.run(initial_state, steps, history='every_k', k=7)
+        np.testing.assert_array_equal(decimated, full[::7])
+
+        packed, _ = self.simulator.run(initial_state, steps, history='bitpacked')
+        np.testing.assert_array_equal(np.unpackbits(packed, axis=1, count=3), full)
+
+        # Con entradas externas por paso se registra paso a paso
+        last_ext, _ = self.simulator.run(initial_state, 10, external_inputs=[{}] * 10, history='last_k', k=4)
+        np.testing.assert_array_equal(last_ext, full[7:11])
+
+    def test_history_memmap(self):
+        """Prueba que el modo 'memmap' escribe la historia en un archivo .npy."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'history.npy')
+            history, _ = self.simulator.run(np.array([1, 0, 0]), 6, history='memmap', path=path)
+            stored = np.load(path, mmap_mode='r')
+            np.testing.assert_array_equal(stored, self.simulator.run(np.array([1, 0, 0]), 6)[0])
+            del history, stored
+
+        with self.assertRaises(ValueError):
+            self.simulator.run(np.array([1, 0, 0]), 6, history='memmap')
+
     def test_modulation(self):
         """Prueba que el simulador puede manejar reglas lógicas dinámicas (modulación)."""
         # Crear una red de 2 nodos:
@@ -84,6 +125,225 @@ class TestSimulation(unittest.TestCase):
         # El nodo 2 debería permanecer desactivado
         self.assertEqual(history_off[-1, 1], 0)
 
+    def test_dynamic_rules_cache(self):
+        """Prueba que las funciones dinámicas se especializan una vez por patrón externo, en una LRU acotada."""
+        calls = []
+
+        def gated_function(external_values):
+            calls.append(external_values.get('gate'))
+            return [[1]] if external_values.get('gate') == 1 else [[-1]]
+
+        var1 = InternalVariable(index=1, cnf_function=[[1]])
+        var2 = InternalVariable(index=2, cnf_function=gated_function)
+        network = LocalNetwork(index=3, internal_variables=[1, 2])
+        network.descriptive_function_variables = [var1, var2]
+        simulator = Simulator(network, cache_size=2)
+
+        external_inputs = [{'gate': 1}, {'gate': 0}] * 5
+        history, _ = simulator.run(np.array([1, 0]), steps=10, external_inputs=external_inputs)
+        np.testing.assert_array_equal(history[1:, 1], [1, 0] * 5)
+        # Un solo callable evaluado por patrón distinto
+        self.assertEqual(calls, [1, 0])
+
+        # Un tercer patrón desaloja al menos usado
+        simulator.run(np.array([1, 0]), steps=1, external_inputs=[{'gate': 2}])
+        self.assertEqual(len(simulator._rules_cache), 2)
+        self.assertNotIn(frozenset({'gate': 1}.items()), simulator._rules_cache)
+
+    def test_dynamic_rules_keep_static_variables(self):
+        """Prueba que especializar solo las funciones dinámicas reproduce la red compilada entera."""
+        rng = np.random.default_rng(3)
+        static_variables, mixed_variables = [], []
+        for i in range(1, 16):
+            candidates = np.concatenate([np.arange(1, 16), [50]])
+            cnf = [[int(v) * int(rng.choice([-1, 1])) for v in rng.choice(candidates, 2, replace=False)]
+                   for _ in range(2)]
+            static_variables.append(InternalVariable(index=i, cnf_function=cnf))
+            # Una de cada cuatro variables devuelve la misma CNF desde un callable
+            function = (lambda external_values, cnf=cnf: cnf) if i % 4 == 0 else cnf
+            mixed_variables.append(InternalVariable(index=i, cnf_function=function))
+
+        simulators = []
+        for variables in (static_variables, mixed_variables):
+            network = LocalNetwork(index=11, internal_variables=list(range(1, 16)))
+            network.descriptive_function_variables = variables
+            network.external_variables = [50]
+            simulators.append(Simulator(network, max_lut_fan_in=4))
+        self.assertTrue(simulators[1].is_dynamic)
+
+        external_inputs = [{50: int(rng.integers(0, 2)), 'phase': t} for t in range(40)]
+        initial_state = rng.integers(0, 2, size=15)
+        np.testing.assert_array_equal(
+            simulators[1].run(initial_state, 40, external_inputs=external_inputs)[0],
+            simulators[0].run(initial_state, 40, external_inputs=external_inputs)[0]
+        )
+
+    def test_truth_tables_match_clause_evaluation(self):
+        """Prueba que las variables tabuladas evolucionan igual que con el evaluador de cláusulas."""
+        rng = np.random.default_rng(1)
+        variables = []
+        for i in range(1, 13):
+            # Fan-in variable: algunas variables quedan por encima del límite de tabulación
+            n_literals = 2 if i % 2 else 5
+            cnf = [[int(v) * int(rng.choice([-1, 1])) for v in rng.choice(np.arange(1, 13), n_literals, replace=False)]
+                   for _ in range(2)]
+            variables.append(InternalVariable(index=i, cnf_function=cnf))
+        network = LocalNetwork(index=4, internal_variables=list(range(1, 13)))
+        network.descriptive_function_variables = variables
+
+        tabulated = Simulator(network, max_lut_fan_in=6)
+        clauses_only = Simulator(network, max_lut_fan_in=-1)
+        self.assertTrue(np.any(tabulated.static_rules.lut_offset >= 0))
+        self.assertTrue(np.any(tabulated.static_rules.lut_offset < 0))
+
+        initial_state = rng.integers(0, 2, size=12)
+        np.testing.assert_array_equal(tabulated.run(initial_state, 20)[0], clauses_only.run(initial_state, 20)[0])
+
+    def test_incremental_matches_full_update(self):
+        """Prueba que la actualización por eventos reproduce la evaluación completa."""
+        rng = np.random.default_rng(2)
+        variables = []
+        for i in range(1, 41):
+            cnf = [[int(v) * int(rng.choice([-1, 1])) for v in rng.choice(np.arange(1, 41), 3, replace=False)]
+                   for _ in range(int(rng.integers(0, 3)))]
+            variables.append(InternalVariable(index=i, cnf_function=cnf))
+        network = LocalNetwork(index=5, internal_variables=list(range(1, 41)))
+        network.descriptive_function_variables = variables
+        simulator = Simulator(network, max_lut_fan_in=2)
+
+        for _ in range(5):
+            initial_state = rng.integers(0, 2, size=40)
+            full, _ = simulator.run(initial_state, 50)
+            incremental, _ = simulator.run(initial_state, 50, incremental=True)
+            np.testing.assert_array_equal(incremental, full)
+
+    def test_incremental_history_modes(self):
+        """Prueba que el modo incremental reconstruye la historia de cada modo a partir de los eventos."""
+        rng = np.random.default_rng(8)
+        variables = []
+        for i in range(1, 21):
+            cnf = [[int(v) * int(rng.choice([-1, 1])) for v in rng.choice(np.arange(1, 21), 2, replace=False)]
+                   for _ in range(int(rng.integers(1, 3)))]
+            variables.append(InternalVariable(index=i, cnf_function=cnf))
+        network = LocalNetwork(index=9, internal_variables=list(range(1, 21)))
+        network.descriptive_function_variables = variables
+        simulator = Simulator(network)
+
+        steps = 9000  # más de un bloque del kernel
+        initial_state = rng.integers(0, 2, size=20)
+        full, _ = simulator.run(initial_state, steps)
+        final, _ = simulator.run(initial_state, steps, history='none', incremental=True)
+        np.testing.assert_array_equal(final, full[-1:])
+        last, _ = simulator.run(initial_state, steps, history='last_k', k=5, incremental=True)
+        np.testing.assert_array_equal(last, full[-5:])
+        sampled, _ = simulator.run(initial_state, steps, history='every_k', k=7, incremental=True)
+        np.testing.assert_array_equal(sampled, full[::7])
+
+    def test_incremental_fixed_point_has_no_events(self):
+        """Prueba que en un punto fijo el kernel incremental no emite eventos de cambio."""
+        network = LocalNetwork(index=10, internal_variables=[1, 2])
+        network.descriptive_function_variables = [
+            InternalVariable(index=1, cnf_function=[[1]]),
+            InternalVariable(index=2, cnf_function=[[2]]),
+        ]
+        rules = Simulator(network).compiled_rules()
+        final_state, event_step, event_var = load_kernels()._simulate_incremental(
+            np.array([1, 0], dtype=np.uint8), np.zeros((100, 0), dtype=np.uint8),
+            *rules.dependency_index(), *rules.kernel_args()
+        )
+        np.testing.assert_array_equal(final_state, [1, 0])
+        self.assertEqual(len(event_step), 0)
+        self.assertEqual(len(event_var), 0)
+
+    def test_incremental_with_external_inputs(self):
+        """Prueba que el modo incremental sigue un programa de entradas externas variable."""
+        rng = np.random.default_rng(4)
+        variables = []
+        for i in range(1, 31):
+            candidates = np.concatenate([np.arange(1, 31), [100, 101]])
+            cnf = [[int(v) * int(rng.choice([-1, 1])) for v in rng.choice(candidates, 3, replace=False)]
+                   for _ in range(int(rng.integers(1, 3)))]
+            variables.append(InternalVariable(index=i, cnf_function=cnf))
+        network = LocalNetwork(index=6, internal_variables=list(range(1, 31)))
+        network.descriptive_function_variables = variables
+        network.external_variables = [100, 101]
+        simulator = Simulator(network, max_lut_fan_in=2)
+
+        external_inputs = [{100: int(rng.integers(0, 2)), 101: int(t // 10 % 2)} for t in range(60)]
+        initial_state = rng.integers(0, 2, size=30)
+        full, _ = simulator.run(initial_state, 60, external_inputs=external_inputs)
+        incremental, _ = simulator.run(initial_state, 60, external_inputs=external_inputs, incremental=True)
+        np.testing.assert_array_equal(incremental, full)
+
+        # Con funciones dinámicas, las reglas cambian con las entradas
+        gated = InternalVariable(index=1, cnf_function=lambda external_values: [[1]] if external_values.get('gate') else [[-1]])
+        network = LocalNetwork(index=7, internal_variables=[1])
+        network.descriptive_function_variables = [gated]
+        with self.assertRaises(ValueError):
+            Simulator(network).run(np.array([1]), 2, external_inputs=[{'gate': 0}, {'gate': 1}], incremental=True)
+
+    @unittest.skipUnless(os.environ.get('CBN_RUN_BENCHMARKS'), "Benchmark de tiempo: se ejecuta con CBN_RUN_BENCHMARKS=1.")
+    def test_full_step_performance(self):
+        """
+        Guarda contra regresiones de rendimiento del paso completo: evaluar 5000 variables
+        no debe costar mucho más que el paso bit a bit con una sola palabra, que recorre
+        los mismos literales (ambos cuestan lo mismo salvo un factor ~1.5).
+        """
+        from cbn_neuroscience.core import boolean_kernels
+
+        rng = np.random.default_rng(3)
+        n = 5000
+        cnf_functions = [[[int(v) * int(rng.choice([-1, 1])) for v in rng.integers(1, n + 1, 2)] for _ in range(2)]
+                         for _ in range(n)]
+        args = compile_cnf_rules(cnf_functions, [], max_lut_fan_in=0).kernel_args()
+        state = rng.integers(0, 2, n).astype(np.uint8)
+        packed = np.zeros((n, 1), dtype=np.uint64)
+        no_external = np.zeros(0, dtype=np.uint8)
+
+        def best_time(kernel, *kernel_args):
+            kernel(*kernel_args)
+            timings = []
+            for _ in range(20):
+                start = time.perf_counter()
+                for _ in range(10):
+                    kernel(*kernel_args)
+                timings.append(time.perf_counter() - start)
+            return min(timings)
+
+        full_step = best_time(boolean_kernels._accelerated_next_state, state, no_external, *args)
+        bitwise_step = best_time(boolean_kernels._bitwise_next_state, packed, no_external.astype(np.uint64), *args[:4])
+        self.assertLess(full_step, 4 * bitwise_step)
+
+    def test_run_batch_matches_single_runs(self):
+        """Prueba que el modo por lotes bit a bit coincide con la simulación trayectoria a trayectoria."""
+        var1 = InternalVariable(index=1, cnf_function=[[2, -3], [1, 3]])
+        var2 = InternalVariable(index=2, cnf_function=[[-1], [2, 3]])
+        var3 = InternalVariable(index=3, cnf_function=[[1, 2, -3]])
+        network = LocalNetwork(index=2, internal_variables=[1, 2, 3])
+        network.descriptive_function_variables = [var1, var2, var3]
+        simulator = Simulator(network)
+
+        # Más de 64 trayectorias para cubrir varias palabras uint64
+        rng = np.random.default_rng(0)
+        initial_states = rng.integers(0, 2, size=(130, 3))
+        final_states = simulator.run_batch(initial_states, steps=5)
+
+        self.assertEqual(final_states.shape, initial_states.shape)
+        for state, final_state in zip(initial_states, final_states):
+            history, _ = simulator.run(state, 5)
+            np.testing.assert_array_equal(final_state, history[-1])
+
+    def test_kernels_loaded_lazily(self):
+        """Prueba que importar el simulador no carga los kernels y que warmup los compila."""
+        code = ("import sys; import cbn_neuroscience.core.simulation; "
+                "print('cbn_neuroscience.core.boolean_kernels' in sys.modules)")
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        self.assertEqual(output.stdout.strip(), 'False')
+
+        warmup()
+        history, _ = self.simulator.run(np.array([1, 0, 0]), 3)
+        np.testing.assert_array_equal(history[-1], [1, 0, 0])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,53 @@
+# tests/test_state_space.py
+
+import unittest
+from cbnetwork.localnetwork import LocalNetwork
+from cbnetwork.internalvariable import InternalVariable
+from cbn_neuroscience.core.simulation import Simulator
+from cbn_neuroscience.core.state_space import map_state_space
+
+class TestStateSpace(unittest.TestCase):
+
+    def setUp(self):
+        """Red de 7 nodos: un registro de desplazamiento en anillo (1..4) y un interruptor (5..7)."""
+        cnfs = {
+            1: [[4]], 2: [[1]], 3: [[2]], 4: [[3]],
+            5: [[5]], 6: [[5], [-7]], 7: [[6, 7]],
+        }
+        variables = [InternalVariable(index=i, cnf_function=cnf) for i, cnf in cnfs.items()]
+        network = LocalNetwork(index=0, internal_variables=list(cnfs))
+        network.descriptive_function_variables = variables
+        self.simulator = Simulator(network)
+
+    def test_transition_table_matches_simulation(self):
+        """Prueba que la tabla de transición coincide con el simulador estado por estado."""
+        state_space = map_state_space(self.simulator)
+        self.assertEqual(len(state_space.successors), 2 ** 7)
+
+        for code in range(2 ** 7):
+            state = state_space.decode(code)
+            history, _ = self.simulator.run(state, 1)
+            self.assertEqual(state_space.successors[code], state_space.encode(history[1]))
+
+    def test_attractors_and_basins(self):
+        """Prueba que los atractores y las cuencas cubren todo el espacio de estados."""
+        state_space = map_state_space(self.simulator)
+
+        self.assertEqual(state_space.basin_sizes.sum(), 2 ** 7)
+        self.assertEqual(len(state_space.basin_sizes), len(state_space.attractors))
+
+        # Cada estado alcanza el atractor de su cuenca según el simulador compilado
+        for code in range(2 ** 7):
+            _, cycle_states, _ = self.simulator.run_until_attractor(state_space.decode(code))
+            attractor = state_space.basin_of[code]
+            expected_codes = set(state_space.attractors[attractor].tolist())
+            self.assertEqual({state_space.encode(s) for s in cycle_states}, expected_codes)
+
+    def test_too_many_variables(self):
+        """Prueba que se rechazan redes demasiado grandes para la enumeración exhaustiva."""
+        with self.assertRaises(ValueError):
+            map_state_space(self.simulator, max_variables=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+# tests/test_uncertainty.py
+
+import unittest
+import numpy as np
+from cbnetwork.localnetwork import LocalNetwork
+from cbnetwork.internalvariable import InternalVariable
+from cbn_neuroscience.core.simulation import Simulator
+from cbn_neuroscience.core.uncertainty import uncertainty_sweep
+
+class TestUncertaintySweep(unittest.TestCase):
+
+    def setUp(self):
+        """Red de 3 nodos con memoria: cada nodo se mantiene a sí mismo (todos los estados son puntos fijos)."""
+        variables = [InternalVariable(index=i, cnf_function=[[i]]) for i in (1, 2, 3)]
+        network = LocalNetwork(index=0, internal_variables=[1, 2, 3])
+        network.descriptive_function_variables = variables
+        self.simulator = Simulator(network)
+
+    def test_noise_free_limit(self):
+        """Sin ruido, cada trayectoria permanece en su punto fijo inicial."""
+        results = uncertainty_sweep(self.simulator, [0.0], n_trajectories=50, steps=20)
+
+        self.assertEqual(results['attractor_hit_rate'][0], 1.0)
+        self.assertEqual(results['attractor_occupancy'][0], 1.0)
+        self.assertEqual(results['mean_dwell_time'][0], 21.0)
+        self.assertEqual(results['mean_first_hit'][0], 0.0)
+
+    def test_noise_shortens_dwell_times(self):
+        """El tiempo de permanencia disminuye con p_error y el barrido es reproducible."""
+        attractor = np.array([[0, 0, 0]])
+        initial_states = np.zeros((200, 3), dtype=int)
+        p_errors = [0.0, 0.05, 0.3]
+
+        results = uncertainty_sweep(self.simulator, p_errors, 200, 100, initial_states=initial_states,
+                                    attractor_states=attractor, seed=1)
+        repeated = uncertainty_sweep(self.simulator, p_errors, 200, 100, initial_states=initial_states,
+                                     attractor_states=attractor, seed=1)
+
+        self.assertTrue(np.all(np.diff(results['mean_dwell_time']) < 0))
+        self.assertTrue(np.all(np.diff(results['attractor_occupancy']) < 0))
+        # Con p_error = 0.3 la densidad media tiende a 0.5 partiendo de cero
+        self.assertGreater(results['mean_density'][2], 0.3)
+        for key in results:
+            np.testing.assert_array_equal(results[key], repeated[key])
+
+
+if __name__ == '__main__':
+    unittest.main()